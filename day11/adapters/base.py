@@ -1,7 +1,28 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable
 
 class ModelAdapter:
     name: str
-    
+    batch_size: int = 8
+
     def predict(self, inputs: List[str], params: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def _length_order(self, inputs: List[str]) -> List[int]:
+        tokenizer = getattr(getattr(self, "pipe", None), "tokenizer", None)
+        if tokenizer is not None:
+            lengths = [len(ids) for ids in tokenizer(list(inputs), add_special_tokens=False)["input_ids"]]
+        else:
+            lengths = [len(t) for t in inputs]
+        return sorted(range(len(inputs)), key=lambda i: lengths[i])
+
+    def _run_sorted(self, inputs: List[str], fn: Callable[[List[str]], List[Any]]) -> List[Any]:
+        # 토큰 길이 순으로 정렬해 배치 내 패딩을 줄이고, 결과는 원래 순서로 되돌린다.
+        if not inputs:
+            return []
+        order = self._length_order(inputs)
+        outs = fn([inputs[i] for i in order])
+        result: List[Any] = [None] * len(inputs)
+        for pos, i in enumerate(order):
+            r = outs[pos]
+            result[i] = r[0] if isinstance(r, list) else r
+        return result
@@ -0,0 +1,184 @@
+from typing import Any, Callable, Dict, List
+import importlib
+import multiprocessing as mp
+import os
+import queue
+import threading
+
+# 모델을 별도 워커 프로세스에서 실행하는 어댑터 프록시
+# API 프로세스(이벤트 루프)는 파이프로 입력을 보내고 결과를 기다리기만 하므로
+# 추론이 GIL 을 두고 요청 파싱과 경쟁하지 않고, 워커마다 torch 스레드 수를 고정할 수 있다.
+# 이 모듈은 워커에서 가장 먼저 import 되므로 torch / transformers 를 import 하지 않는다.
+
+_THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+def _load_factory(target: str) -> Callable[[], Any]:
+    module, _, qualname = target.partition(":")
+    obj: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+def _worker_main(target: str, threads: int, conn, kwargs: Dict[str, Any]):
+    # 스레드 수 환경변수는 torch 가 import 되기 전에 설정해야 적용된다
+    for var in _THREAD_VARS:
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass
+
+    try:
+        adapter = _load_factory(target)(**kwargs)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", {
+        "model_used": getattr(adapter, "model_used", None),
+        "model_name": getattr(adapter, "model_name", None),
+        "batch_size": getattr(adapter, "batch_size", None),
+        "pid": os.getpid()
+    }))
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+        method, args, kwargs = msg
+        try:
+            conn.send(("ok", getattr(adapter, method)(*args, **kwargs)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+class _Worker:
+    def __init__(self, ctx, target: str, threads: int, kwargs: Dict[str, Any]):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(target, threads, child, kwargs), daemon=True)
+        self.proc.start()
+        child.close()
+        self.info: Dict[str, Any] = {}
+
+    def wait_ready(self):
+        # 워커가 모델 로드를 마칠 때까지 대기
+        try:
+            status, info = self.conn.recv()
+        except EOFError:
+            status, info = "error", f"exit code {self.proc.exitcode}"
+        if status != "ready":
+            self.close()
+            raise RuntimeError(f"모델 워커 로드 실패: {info}")
+        self.info = info
+
+    def call(self, method: str, args: tuple, kwargs: dict) -> Any:
+        self.conn.send((method, args, kwargs))
+        status, result = self.conn.recv()
+        if status == "error":
+            raise RuntimeError(result)
+        return result
+
+    def close(self, timeout_s: float = 5.0):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.proc.join(timeout_s)
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.conn.close()
+
+class ProcessAdapter:
+    def __init__(self, name: str, factory: Callable[..., Any], procs: int = 1, threads: int = 1, **factory_kwargs):
+        self.name = name
+        # spawn 워커에서 다시 import 할 수 있도록 "모듈:이름" 으로 넘긴다
+        self.target = f"{factory.__module__}:{factory.__qualname__}"
+        self.threads = max(1, int(threads))
+        self._ctx = mp.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        # 진행 중인 호출 수. close() 는 이 값이 0 이 될 때까지 기다려 사용 중인 파이프로 종료 메시지를 보내지 않는다
+        self._cond = threading.Condition()
+        self._active = 0
+        self._closed = False
+
+        # 워커들은 동시에 띄우고 모두 로드될 때까지 기다린다
+        # factory_kwargs (batch_size 등) 는 워커에서 어댑터를 만들 때 그대로 넘긴다
+        self.factory_kwargs = factory_kwargs
+        self._workers = [_Worker(self._ctx, self.target, self.threads, self.factory_kwargs) for _ in range(max(1, int(procs)))]
+        try:
+            for w in self._workers:
+                w.wait_ready()
+        except Exception:
+            self.close()
+            raise
+        for w in self._workers:
+            self._idle.put(w)
+
+        info = self._workers[0].info
+        self.model_used = info.get("model_used")
+        self.model_name = info.get("model_name")
+        self.batch_size = info.get("batch_size") or 8
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"모델 워커가 내려간 상태입니다: {self.name}")
+            self._active += 1
+        try:
+            # 쉬고 있는 워커 하나를 잡아 호출. 모두 바쁘면 (to_thread 스레드에서) 기다린다
+            w = self._idle.get()
+            try:
+                return w.call(method, args, kwargs)
+            except (EOFError, OSError):
+                # 워커가 죽었으면 새로 띄우고 이번 호출은 실패로 돌려준다
+                w = self._respawn(w)
+                raise RuntimeError(f"모델 워커 프로세스가 종료되었습니다: {self.name}")
+            finally:
+                self._idle.put(w)
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def _respawn(self, dead: _Worker) -> _Worker:
+        dead.close(timeout_s=0)
+        try:
+            w = _Worker(self._ctx, self.target, self.threads, self.factory_kwargs)
+            w.wait_ready()
+        except Exception:
+            return dead
+        self._workers = [w if x is dead else x for x in self._workers]
+        return w
+
+    def predict(self, inputs: List[str], params: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
+        return self._call("predict", inputs=inputs, params=params)
+
+    def embed_array(self, texts):
+        return self._call("embed_array", texts)
+
+    def embed(self, texts):
+        return self.embed_array(texts).tolist()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "backend": "process",
+            "procs": len(self._workers),
+            "threads": self.threads,
+            "pids": [w.proc.pid for w in self._workers],
+            "busy": len(self._workers) - self._idle.qsize()
+        }
+
+    def close(self, timeout_s: float = 30.0):
+        # 새 호출은 막고, 진행 중인 호출이 끝난 뒤 워커를 내린다 (블로킹이므로 이벤트 루프 밖에서 부른다)
+        with self._cond:
+            self._closed = True
+            self._cond.wait_for(lambda: self._active == 0, timeout_s)
+        for w in self._workers:
+            w.close()
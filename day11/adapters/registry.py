@@ -1,23 +1,151 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List
+import asyncio
+import functools
+import threading
+import time
 from .base import ModelAdapter
 from .sentence_transformer_adapter import SentenceTransformerAdapter
+from .process_adapter import ProcessAdapter
+from .stub import STUB_ADAPTERS
+
+# 등록된 모델을 로드하지 못한 경우 (다운로드 실패, 메모리 부족, 워커 프로세스 시작 실패 등)
+# 등록되지 않은 모델 이름은 KeyError 로 구분한다
+class ModelLoadError(Exception):
+    pass
 
 class ModelRegistry:
-    def __init__(self):
+    def __init__(self, idle_unload_s: float | None = None):
         self._store: Dict[str, Any] = {}
-        emb = SentenceTransformerAdapter()
-        self._store["embedding"] = emb
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._last_used: Dict[str, float] = {}
+        self.idle_unload_s = idle_unload_s
+        # 모델별 추론 배치 크기 (없으면 어댑터 기본값). 다음 로드부터 적용된다
+        self.batch_sizes: Dict[str, int] = {}
+        self.register_factory("embedding", SentenceTransformerAdapter)
 
     def register(self, adapter):
         self._store[adapter.name] = adapter
+        self._last_used[adapter.name] = time.monotonic()
+
+    def register_factory(self, name: str, factory: Callable[[], Any]):
+        # 모델은 첫 get() 또는 warmup() 때 로드된다
+        self._factories[name] = factory
+        self._locks.setdefault(name, threading.Lock())
+
+    def use_stubs(self) -> List[str]:
+        # 같은 이름의 스텁 어댑터로 바꾼다 (모델 다운로드 없이 벤치마크 / 테스트할 때)
+        for cls in STUB_ADAPTERS:
+            self.register_factory(cls.name, cls)
+        return [cls.name for cls in STUB_ADAPTERS]
+
+    def use_process_workers(self, names: List[str], procs: int = 1, threads: int = 1) -> List[str]:
+        # 지정한 모델은 로드 시 워커 프로세스(procs 개, 프로세스당 threads 스레드)에서 띄운다
+        wrapped = []
+        for name in names:
+            factory = self._factories.get(name)
+            if factory is None or isinstance(factory, functools.partial):
+                continue
+            self._factories[name] = functools.partial(ProcessAdapter, name, factory, procs, threads)
+            wrapped.append(name)
+        return wrapped
 
     def get(self, name: str):
-        if name not in self._store:
+        adapter = self._store.get(name)
+        if adapter is None:
+            if name not in self._factories:
+                raise KeyError(name)
+            with self._locks[name]:
+                adapter = self._store.get(name)
+                if adapter is None:
+                    kwargs = {"batch_size": int(self.batch_sizes[name])} if name in self.batch_sizes else {}
+                    try:
+                        adapter = self._factories[name](**kwargs)
+                    except Exception as e:
+                        raise ModelLoadError(f"모델 로드 실패: {name}: {e}") from e
+                    self._store[name] = adapter
+        self._last_used[name] = time.monotonic()
+        return adapter
+
+    async def aget(self, name: str):
+        # 로드가 필요한 경우 이벤트 루프를 막지 않도록 스레드에서 로드
+        if name in self._store:
+            return self.get(name)
+        if name not in self._factories:
             raise KeyError(name)
-        return self._store[name]
+        return await asyncio.to_thread(self.get, name)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._store
+
+    async def warmup(self, names: List[str]) -> Dict[str, str | None]:
+        result: Dict[str, str | None] = {}
+        for name in names:
+            try:
+                await self.aget(name)
+                result[name] = None
+            except Exception as e:
+                result[name] = str(e)
+        return result
+
+    def _idle(self, name: str, now: float) -> bool:
+        # 긴 추론 (대량 작업 등) 이 진행 중인 모델은 get() 이후 시간이 지났어도 쉬는 것으로 보지 않는다
+        if now - self._last_used.get(name, now) < self.idle_unload_s:
+            return False
+        return not getattr(self._store.get(name), "active", 0)
+
+    def unload(self, name: str, idle_only: bool = False) -> bool:
+        # 팩토리로 등록된 모델만 내린다 (다시 get() 하면 재로드 가능)
+        if name not in self._factories:
+            return False
+        with self._locks[name]:
+            if idle_only and not self._idle(name, time.monotonic()):
+                return False
+            adapter = self._store.pop(name, None)
+        if adapter is None:
+            return False
+        # 워커 프로세스로 띄운 모델은 프로세스도 함께 내린다
+        close = getattr(adapter, "close", None)
+        if close is not None:
+            close()
+        return True
+
+    def close(self):
+        for name in list(self._store):
+            self.unload(name)
+
+    def unload_idle(self) -> List[str]:
+        if not self.idle_unload_s:
+            return []
+        now = time.monotonic()
+        unloaded = []
+        for name in list(self._store):
+            # 잠금을 잡은 뒤 한 번 더 확인한다
+            if self._idle(name, now) and self.unload(name, idle_only=True):
+                unloaded.append(name)
+        return unloaded
+
+    async def run_idle_reaper(self, interval_s: float = 60.0):
+        while True:
+            await asyncio.sleep(interval_s)
+            # 워커 프로세스 종료 대기 (join) 가 이벤트 루프를 막지 않도록 스레드에서 내린다
+            await asyncio.to_thread(self.unload_idle)
 
     def list_model(self):
-        return list(self._store.keys())
+        return list(dict.fromkeys([*self._factories, *self._store]))
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        out = {}
+        for name in self.list_model():
+            adapter = self._store.get(name)
+            out[name] = {
+                "loaded": adapter is not None,
+                "idle_s": round(now - self._last_used[name], 1) if name in self._last_used else None
+            }
+            if isinstance(adapter, ProcessAdapter):
+                out[name]["workers"] = adapter.status()
+        return out
     
 registry = ModelRegistry()
 
@@ -25,10 +153,6 @@ from .translate_koen import TranslateKoEnAdapter
 from .summarize import SummarizeAdapter
 from .sentiment import SentimentAdapter
 
-adapter1 = TranslateKoEnAdapter()
-adapter2 = SummarizeAdapter()
-adapter3 = SentimentAdapter()
-
-registry.register(adapter1)
-registry.register(adapter2)
-registry.register(adapter3)
\ No newline at end of file
+registry.register_factory(TranslateKoEnAdapter.name, TranslateKoEnAdapter)
+registry.register_factory(SummarizeAdapter.name, SummarizeAdapter)
+registry.register_factory(SentimentAdapter.name, SentimentAdapter)
@@ -1,9 +1,14 @@
 from sentence_transformers import SentenceTransformer
+import numpy as np
 
 class SentenceTransformerAdapter:
-    def __init__(self, model_name: str = "intfloat/multilingual-e5-small"):
+    def __init__(self, model_name: str = "intfloat/multilingual-e5-small", batch_size: int = 32):
         self.model_name = model_name
+        self.batch_size = batch_size
         self._model = SentenceTransformer(model_name)
 
+    def embed_array(self, texts) -> np.ndarray:
+        return np.asarray(self._model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True), dtype=np.float32)
+
     def embed(self, texts):
-        return self._model.encode(texts, normalize_embeddings=True).tolist()
\ No newline at end of file
+        return self.embed_array(texts).tolist()
@@ -5,13 +5,11 @@ from typing import List, Dict, Any
 class SentimentAdapter(ModelAdapter):
     name = "sentiment"
 
-    def __init__(self, model_id="Copycats/koelectra-base-v3-generalized-sentiment-analysis"):
+    def __init__(self, model_id="Copycats/koelectra-base-v3-generalized-sentiment-analysis", batch_size: int = 32):
         self.pipe = pipeline(task="text-classification", model=model_id)
         self.model_used = model_id
+        self.batch_size = batch_size
 
     def predict(self, inputs: List[str], params: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
-        out = []
-        for t in inputs:
-            r = self.pipe(t)[0]
-            out.append({"text": r["label"], "score": r["score"]})
-        return out
+        outs = self._run_sorted(inputs, lambda batch: self.pipe(batch, batch_size=self.batch_size))
+        return [{"text": r["label"], "score": r["score"]} for r in outs]
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List
+import hashlib
+import os
+import time
+import numpy as np
+
+from .base import ModelAdapter
+
+# 실제 모델 대신 지연 시간만 흉내 내는 스텁 어댑터 (벤치마크 / 로컬 테스트용, 모델 다운로드 없음)
+# predict 한 번의 지연 = STUB_LATENCY_MS + STUB_PER_ITEM_MS * 입력 수
+# time.sleep 은 GIL 을 놓으므로 torch 추론처럼 다른 스레드를 막지 않는다.
+# 워커 프로세스에서도 같은 설정을 쓰도록 값은 생성 시점에 환경변수에서 읽는다.
+
+def _env_ms(name: str, default: str) -> float:
+    return float(os.getenv(name, default)) / 1000
+
+class StubAdapter(ModelAdapter):
+    name = "stub"
+
+    def __init__(self, batch_size: int = ModelAdapter.batch_size):
+        self.model_used = f"stub:{self.name}"
+        self.batch_size = batch_size
+        self.latency_s = _env_ms("STUB_LATENCY_MS", "20")
+        self.per_item_s = _env_ms("STUB_PER_ITEM_MS", "1")
+
+    def _sleep(self, n: int):
+        time.sleep(self.latency_s + self.per_item_s * n)
+
+    def _output(self, text: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"text": text[::-1]}
+
+    def predict(self, inputs: List[str], params: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
+        self._sleep(len(inputs))
+        return [self._output(t, params or {}) for t in inputs]
+
+class StubTranslateAdapter(StubAdapter):
+    name = "translate-koen"
+
+class StubSummarizeAdapter(StubAdapter):
+    name = "summarize"
+
+    def _output(self, text: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"text": text[:int(params.get("max_length", 64))]}
+
+class StubSentimentAdapter(StubAdapter):
+    name = "sentiment"
+
+    def _output(self, text: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        score = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:4], 16) / 0xFFFF
+        return {"text": "1" if score >= 0.5 else "0", "score": round(score, 4)}
+
+class StubEmbeddingAdapter(StubAdapter):
+    name = "embedding"
+
+    def __init__(self, batch_size: int = ModelAdapter.batch_size):
+        super().__init__(batch_size)
+        self.model_name = self.model_used
+        self.dim = int(os.getenv("STUB_EMBED_DIM", "384"))
+
+    def embed_array(self, texts) -> np.ndarray:
+        # 같은 텍스트는 항상 같은 단위 벡터
+        self._sleep(len(texts))
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            seed = int(hashlib.md5(t.encode("utf-8")).hexdigest()[:8], 16)
+            v = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            out[i] = v / np.linalg.norm(v)
+        return out
+
+    def embed(self, texts):
+        return self.embed_array(texts).tolist()
+
+STUB_ADAPTERS = (StubTranslateAdapter, StubSummarizeAdapter, StubSentimentAdapter, StubEmbeddingAdapter)
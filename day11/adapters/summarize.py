@@ -5,12 +5,14 @@ from typing import List, Dict, Any
 class SummarizeAdapter(ModelAdapter):
     name = "summarize"
 
-    def __init__(self, model_id="gogamza/kobart-summarization"):
+    def __init__(self, model_id="gogamza/kobart-summarization", batch_size: int = 8):
         self.pipe = pipeline(task="summarization", model=model_id)
         self.model_used = model_id
+        self.batch_size = batch_size
 
     def predict(self, inputs: List[str], params: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
         params = params or {}
         max_len = int(params.get("max_length", 64))
         min_len = int(params.get("min_length", 20))
-        return [{"text": self.pipe(t, max_length=max_len, min_length=min_len)[0]["summary_text"]} for t in inputs]
\ No newline at end of file
+        outs = self._run_sorted(inputs, lambda batch: self.pipe(batch, max_length=max_len, min_length=min_len, batch_size=self.batch_size))
+        return [{"text": r["summary_text"]} for r in outs]
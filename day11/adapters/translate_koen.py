@@ -5,11 +5,13 @@ from typing import List, Dict, Any
 class TranslateKoEnAdapter(ModelAdapter):
     name = "translate-koen"
 
-    def __init__(self, model_id="Helsinki-NLP/opus-mt-ko-en"):
+    def __init__(self, model_id="Helsinki-NLP/opus-mt-ko-en", batch_size: int = 16):
         self.pipe = pipeline(task="translation", model=model_id)
         self.model_used = model_id
+        self.batch_size = batch_size
 
     def predict(self, inputs: List[str], params: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
         params = params or {}
         ml = int(params.get("max_length", 256))
-        return [{"text": self.pipe(t, max_length=ml)[0]["translation_text"]} for t in inputs]
\ No newline at end of file
+        outs = self._run_sorted(inputs, lambda batch: self.pipe(batch, max_length=ml, batch_size=self.batch_size))
+        return [{"text": r["translation_text"]} for r in outs]
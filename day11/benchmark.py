@@ -0,0 +1,370 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+# 추론 API 부하 테스트 / 벤치마크
+#
+#   python benchmark.py                                  # 스텁 모델로 앱을 이 프로세스에서 띄워 측정
+#   python benchmark.py --real-models                    # 실제 모델 (처음 실행 시 다운로드)
+#   python benchmark.py --url http://localhost:8000      # 이미 떠 있는 서버 측정
+#                                                        #   (스텁 서버: STUB_MODELS=1 uvicorn main:app)
+#   python benchmark.py -s infer,vec_query -c 1,16,64 -d 0,0.5,0.9 --compare bench_results/old.json
+#
+# 시나리오 x 동시 요청 수 x 중복 비율 조합마다 처리량 / 지연 시간 분위수를 재고 결과를 JSON 으로 저장한다.
+# 같은 프로세스 모드는 클라이언트와 서버가 이벤트 루프를 나눠 쓰므로 절대값보다 커밋 간 비교용으로 쓴다.
+
+SCENARIOS = (
+    "infer", "infer_detail", "upload_infer", "upload_infer_csv",
+    "embeddings", "vec_upsert", "vec_query", "vec_query_batch"
+)
+VEC_NAMESPACE = "bench"
+
+class TextGen:
+    # dup_ratio 비율로 작은 "인기" 집합에서 뽑고, 나머지는 이번 실행에서 한 번만 나오는 텍스트
+    def __init__(self, dup_ratio: float, hot_set: int, seed: int, nonce: str):
+        self.dup_ratio = dup_ratio
+        self.hot_set = max(1, hot_set)
+        self.rng = random.Random(seed)
+        self.nonce = nonce
+        self._n = 0
+
+    def __call__(self) -> str:
+        if self.rng.random() < self.dup_ratio:
+            return f"자주 들어오는 문장 {self.rng.randrange(self.hot_set)} 오늘 서비스 정말 만족스러웠어요"
+        self._n += 1
+        return f"새로운 문장 {self.nonce}-{self._n} 배송은 느렸지만 상품 품질은 괜찮았습니다"
+
+    def many(self, n: int) -> List[str]:
+        return [self() for _ in range(n)]
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+# ---------- 시나리오별 요청 ----------
+# httpx 는 스트리밍 응답도 본문을 끝까지 읽은 뒤 돌려주므로 업로드 시나리오도 마지막 줄까지의 시간이 잡힌다
+
+def make_request(name: str, args, gen: TextGen) -> Callable[[httpx.AsyncClient], Awaitable[tuple[int, int]]]:
+    # (HTTP 상태 코드, 처리한 입력 수) 를 돌려주는 요청 함수
+    k = args.inputs
+
+    if name in ("infer", "infer_detail"):
+        path = "/v1/infer" if name == "infer" else "/v1/infer_detail"
+
+        async def _infer(c):
+            r = await c.post(path, json={"model": args.model, "inputs": gen.many(k)})
+            return r.status_code, k
+        return _infer
+
+    if name in ("upload_infer", "upload_infer_csv"):
+        path = f"/v1/{name}"
+
+        async def _upload(c):
+            rows = gen.many(args.upload_rows)
+            # 첫 열만 입력으로 읽으므로 헤더 없이 보낸다
+            data = "".join('"' + t.replace('"', '""') + '"\n' for t in rows).encode("utf-8")
+            r = await c.post(
+                path,
+                data={"model": args.model},
+                files={"file": ("bench.csv", data, "text/csv")}
+            )
+            return r.status_code, len(rows)
+        return _upload
+
+    if name == "embeddings":
+        async def _embed(c):
+            r = await c.post("/v1/embeddings", json={"model": args.embed_model, "inputs": gen.many(k)})
+            return r.status_code, k
+        return _embed
+
+    if name == "vec_upsert":
+        async def _upsert(c):
+            items = [{"id": t, "text": t} for t in gen.many(k)]
+            r = await c.post("/v1/vec/upsert", json={"model": args.embed_model, "namespace": VEC_NAMESPACE, "items": items})
+            return r.status_code, k
+        return _upsert
+
+    if name == "vec_query":
+        async def _query(c):
+            r = await c.post("/v1/vec/query", json={
+                "model": args.embed_model, "namespace": VEC_NAMESPACE, "query": gen(), "top_k": args.top_k
+            })
+            return r.status_code, 1
+        return _query
+
+    if name == "vec_query_batch":
+        async def _query_batch(c):
+            r = await c.post("/v1/vec/query_batch", json={
+                "model": args.embed_model, "namespace": VEC_NAMESPACE, "queries": gen.many(k), "top_k": args.top_k
+            })
+            return r.status_code, k
+        return _query_batch
+
+    raise ValueError(f"알 수 없는 시나리오: {name}")
+
+async def prepare_vectors(c: httpx.AsyncClient, args, nonce: str):
+    # 검색 시나리오용 말뭉치. 이미 채워져 있으면 건너뛴다
+    r = await c.get("/v1/vec/namespaces")
+    # 응답은 {"namespaces": {이름: info}}
+    info = r.json().get("namespaces", {}).get(VEC_NAMESPACE)
+    if info and info.get("size", 0) >= args.vec_corpus:
+        return
+    gen = TextGen(0.0, 1, args.seed, f"corpus-{nonce}")
+    for start in range(0, args.vec_corpus, 256):
+        texts = gen.many(min(256, args.vec_corpus - start))
+        items = [{"id": t, "text": t, "metadata": {"group": i % 10}} for i, t in enumerate(texts)]
+        r = await c.post("/v1/vec/upsert", json={"model": args.embed_model, "namespace": VEC_NAMESPACE, "items": items})
+        r.raise_for_status()
+
+# ---------- 실행 ----------
+
+async def run_case(c: httpx.AsyncClient, args, name: str, concurrency: int, dup_ratio: float, nonce: str) -> Dict[str, Any]:
+    gen = TextGen(dup_ratio, args.hot_set, args.seed, f"{nonce}-{name}-{concurrency}-{dup_ratio}")
+    request = make_request(name, args, gen)
+
+    # 모델 로드가 측정에 섞이지 않도록 먼저 몇 번 호출하고 캐시를 비운다
+    for _ in range(args.warmup):
+        await request(c)
+    if not args.keep_cache:
+        await c.delete("/clear_cache")
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    items = 0
+    issued = 0
+    t_start = time.perf_counter()
+    stop_at = t_start + args.duration if args.duration else None
+
+    async def _worker():
+        nonlocal issued, items
+        while True:
+            if stop_at is not None:
+                if time.perf_counter() >= stop_at:
+                    return
+            elif issued >= args.requests:
+                return
+            issued += 1
+            t0 = time.perf_counter()
+            try:
+                status, n = await request(c)
+                key = str(status)
+            except Exception as e:
+                n, key = 0, f"exc:{type(e).__name__}"
+            latencies.append(time.perf_counter() - t0)
+            statuses[key] = statuses.get(key, 0) + 1
+            if key.startswith("2"):
+                items += n
+
+    await asyncio.gather(*[_worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - t_start
+
+    ordered = sorted(latencies)
+    ok = sum(v for s, v in statuses.items() if s.startswith("2"))
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "dup_ratio": dup_ratio,
+        "inputs_per_request": args.upload_rows if name.startswith("upload") else args.inputs,
+        "requests": len(latencies),
+        "ok": ok,
+        "status": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        "inputs_per_s": round(items / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+            "p50": round(percentile(ordered, 0.5) * 1000, 2),
+            "p90": round(percentile(ordered, 0.9) * 1000, 2),
+            "p99": round(percentile(ordered, 0.99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0
+        }
+    }
+
+async def run_all(c: httpx.AsyncClient, args) -> tuple[List[Dict[str, Any]], Dict[str, Any] | None]:
+    nonce = f"{int(time.time())}-{os.getpid()}"
+    results = []
+    if any(s.startswith("vec_query") for s in args.scenarios):
+        await prepare_vectors(c, args, nonce)
+    for name in args.scenarios:
+        for concurrency in args.concurrency:
+            for dup_ratio in args.dup_ratio:
+                row = await run_case(c, args, name, concurrency, dup_ratio, nonce)
+                results.append(row)
+                print_row(row)
+
+    # 서버 쪽 단계별 지연 시간 / 스케줄러 상태 (서버 기동 후 누적값)
+    server = None
+    try:
+        r = await c.get("/metrics", params={"format": "json"})
+        m = r.json()
+        server = {k: m.get(k) for k in ("latency", "scheduler", "cache", "embedding_cache", "coalesced")}
+    except Exception:
+        pass
+    return results, server
+
+async def run_in_process(args):
+    # 앱을 import 하기 전에 환경변수를 정해야 스텁 / 작업 디렉터리 설정이 적용된다
+    if not args.real_models:
+        os.environ["STUB_MODELS"] = "1"
+        os.environ["STUB_LATENCY_MS"] = str(args.stub_latency_ms)
+        os.environ["STUB_PER_ITEM_MS"] = str(args.stub_per_item_ms)
+        os.environ["STUB_EMBED_DIM"] = str(args.stub_dim)
+    os.environ.setdefault("JOB_DIR", tempfile.mkdtemp(prefix="bench-jobs-"))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main as service
+
+    transport = httpx.ASGITransport(app=service.app)
+    async with service.app.router.lifespan_context(service.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout, headers=_headers(args)) as c:
+            return await run_all(c, args)
+
+async def run_remote(args):
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits, headers=_headers(args)) as c:
+        return await run_all(c, args)
+
+def _headers(args) -> Dict[str, str]:
+    return {"X-API-Key": args.api_key} if args.api_key else {}
+
+# ---------- 출력 / 저장 / 비교 ----------
+
+def print_row(row: Dict[str, Any]):
+    lat = row["latency_ms"]
+    errors = {s: n for s, n in row["status"].items() if not s.startswith("2")}
+    print(
+        f"{row['scenario']:<17} c={row['concurrency']:<4} dup={row['dup_ratio']:<4} "
+        f"req={row['requests']:<6} rps={row['rps']:<9} in/s={row['inputs_per_s']:<10} "
+        f"p50={lat['p50']:<8} p90={lat['p90']:<8} p99={lat['p99']:<8} max={lat['max']:<8}"
+        + (f" errors={errors}" if errors else ""),
+        flush=True
+    )
+
+def _git(*cmd: str) -> str | None:
+    try:
+        return subprocess.run(
+            ["git", *cmd], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def _case_key(row: Dict[str, Any]) -> tuple:
+    return (row["scenario"], row["concurrency"], row["dup_ratio"], row["inputs_per_request"])
+
+def compare(base_path: str, results: List[Dict[str, Any]]):
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)
+    before = {_case_key(r): r for r in base.get("results", [])}
+    print(f"\n비교 기준: {base_path} (commit {base.get('meta', {}).get('git_commit')})")
+
+    def _pct(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    matched = 0
+    for row in results:
+        old = before.get(_case_key(row))
+        if old is None:
+            continue
+        matched += 1
+        print(
+            f"{row['scenario']:<17} c={row['concurrency']:<4} dup={row['dup_ratio']:<4} "
+            f"rps {old['rps']} -> {row['rps']} ({_pct(row['rps'], old['rps'])})  "
+            f"p50 {_pct(row['latency_ms']['p50'], old['latency_ms']['p50'])}  "
+            f"p99 {_pct(row['latency_ms']['p99'], old['latency_ms']['p99'])}"
+        )
+    if not matched:
+        print("같은 (시나리오, 동시 요청 수, 중복 비율, 입력 수) 조합이 없습니다.")
+
+def _csv(cast):
+    return lambda s: [cast(x) for x in s.split(",") if x.strip()]
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="추론 API 벤치마크")
+    p.add_argument("--url", help="측정할 서버 주소. 없으면 앱을 이 프로세스에서 띄운다")
+    p.add_argument("--real-models", action="store_true", help="스텁 대신 실제 모델 사용 (같은 프로세스 모드)")
+    p.add_argument("-s", "--scenarios", type=_csv(str), default=["infer", "infer_detail", "embeddings", "vec_query"],
+                   help=f"쉼표로 구분: {', '.join(SCENARIOS)}")
+    p.add_argument("-c", "--concurrency", type=_csv(int), default=[1, 8, 32])
+    p.add_argument("-d", "--dup-ratio", type=_csv(float), default=[0.0, 0.5])
+    p.add_argument("-n", "--requests", type=int, default=200, help="조합마다 보낼 요청 수")
+    p.add_argument("--duration", type=float, default=0, help="지정하면 요청 수 대신 조합마다 이 시간(초) 동안 측정")
+    p.add_argument("--inputs", type=int, default=4, help="요청 하나당 입력 수")
+    p.add_argument("--upload-rows", type=int, default=1000, help="업로드 시나리오의 파일 행 수")
+    p.add_argument("--hot-set", type=int, default=50, help="중복 입력을 뽑는 집합 크기")
+    p.add_argument("--model", default="sentiment")
+    p.add_argument("--embed-model", default="embedding")
+    p.add_argument("--top-k", type=int, default=10)
+    p.add_argument("--vec-corpus", type=int, default=5000, help="검색 시나리오 전에 넣어둘 문서 수")
+    p.add_argument("--warmup", type=int, default=3)
+    p.add_argument("--keep-cache", action="store_true", help="조합 사이에 캐시를 비우지 않는다")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--timeout", type=float, default=300)
+    p.add_argument("--api-key")
+    p.add_argument("--stub-latency-ms", type=float, default=20)
+    p.add_argument("--stub-per-item-ms", type=float, default=1)
+    p.add_argument("--stub-dim", type=int, default=384)
+    p.add_argument("-o", "--out", help="결과 JSON 경로 (기본: bench_results/bench-<시각>-<커밋>.json)")
+    p.add_argument("--compare", help="이전 결과 JSON 과 처리량 / 지연 시간 비교")
+    args = p.parse_args(argv)
+
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        p.error(f"알 수 없는 시나리오: {', '.join(unknown)}")
+    if args.url and args.real_models:
+        p.error("--real-models 는 같은 프로세스 모드에서만 쓸 수 있습니다 (원격 서버는 서버 설정을 따름)")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.time()
+    results, server = asyncio.run(run_remote(args) if args.url else run_in_process(args))
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    report = {
+        "meta": {
+            "started_at": started,
+            "git_commit": commit,
+            "git_dirty": bool(_git("status", "--porcelain", "--", ".")),
+            "target": args.url or "in-process",
+            "models": "remote" if args.url else ("real" if args.real_models else "stub"),
+            "stub": None if (args.url or args.real_models) else {
+                "latency_ms": args.stub_latency_ms,
+                "per_item_ms": args.stub_per_item_ms,
+                "embed_dim": args.stub_dim
+            },
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args)
+        },
+        "results": results,
+        "server": server
+    }
+
+    out = args.out or os.path.join(
+        "bench_results", f"bench-{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}-{commit or 'nogit'}.json"
+    )
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n저장: {out}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+if __name__ == "__main__":
+    main()
@@ -4,21 +4,30 @@ START_TIME = time.time()
 
 from fastapi import FastAPI, HTTPException
 from utils.logger import get_logger
-from models.translate_model import TranslateModel
 from schemas.translate import TranslateRequest, TranslateResponse
 
-from adapters.registry import registry
+from adapters.registry import ModelLoadError, registry
 from schemas.infer import InferRequest, InferResponse
 
 from services.infer_service import InferService
+from services.cache import ResultCache
+from services.disk_cache import DiskCache
+from services.vector_store import VectorStore, check_ids
+from services.embedding_cache import EmbeddingCache
+from services import vec_codec, upload_reader
+from services.jobs import JobManager
+from services.batcher import Overloaded
+from services.metrics import Metrics, HttpMetricsMiddleware, current_scope, endpoint_label
+from services.profiling import SamplingProfiler, ProfilingMiddleware, ProfilerBusy, current_trace, stage
 
 import io, csv, json
 from fastapi import UploadFile, File, Form
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse, PlainTextResponse
 
-import math, asyncio
-from typing import Any
-from fastapi import Depends, Security
+import asyncio
+import math
+from typing import Any, AsyncIterator, Literal
+from fastapi import Depends, Security, Request
 
 import os
 from fastapi.security import APIKeyHeader, APIKeyQuery
@@ -38,20 +47,186 @@ async def require_api_key(
         raise HTTPException(403, detail="잘못된 키")
     return key
 
-def _cos(a: list[float], b: list[float]) -> float:
-    s = sum(x*y for x, y in zip(a, b))
-    na = math.sqrt(sum(x*x for x in a)) or 1e-12
-    nb = math.sqrt(sum(x*x for x in b)) or 1e-12
-    return s / (na * nb)
+# 프로파일링 등 관리자 기능용 키. 설정하지 않으면 관리자 기능은 모두 꺼진다
+ADMIN_API_KEYS = {k.strip() for k in (os.getenv("ADMIN_API_KEYS") or "").split(",") if k.strip()}
 
-_VEC_DB: dict[str, list[dict[str, Any]]] = {}
+async def require_admin_key(
+    key_h: str | None = Security(api_key_header),
+    key_q: str | None = Security(api_key_query)
+):
+    key = key_h or key_q
+    if not ADMIN_API_KEYS:
+        raise HTTPException(403, detail="관리자 기능이 비활성화되어 있습니다 (ADMIN_API_KEYS 미설정)")
+    if not key or key not in ADMIN_API_KEYS:
+        raise HTTPException(403, detail="잘못된 관리자 키")
+    return key
 
-app = FastAPI(title="AI 텍스트 API 서비스", version="2.1.0")
+async def client_id(
+    request: Request,
+    key_h: str | None = Security(api_key_header),
+    key_q: str | None = Security(api_key_query)
+) -> str:
+    # 공정 큐잉 단위. API 키가 있으면 키, 없으면 접속 IP
+    key = key_h or key_q
+    if key:
+        return f"key:{key}"
+    return f"ip:{request.client.host if request.client else ''}"
+
+vec_store = VectorStore(
+    root_dir=os.getenv("VEC_DATA_DIR") or None,
+    snapshot_every=int(os.getenv("VEC_SNAPSHOT_EVERY", "100000")),
+    fsync=os.getenv("VEC_FSYNC", "0") == "1",
+    spill_dir=os.getenv("VEC_SPILL_DIR") or None
+)
+
+service_metrics = Metrics()
+
+class TimedJSONResponse(JSONResponse):
+    # 응답 본문 JSON 인코딩 시간을 엔드포인트별로 기록
+    def render(self, content: Any) -> bytes:
+        t0 = time.perf_counter()
+        body = super().render(content)
+        elapsed = time.perf_counter() - t0
+        service_metrics.serialize_seconds.labels(endpoint_label(current_scope.get())).observe(elapsed)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add("serialize", elapsed)
+        return body
+
+app = FastAPI(title="AI 텍스트 API 서비스", version="2.1.0", default_response_class=TimedJSONResponse)
+app.add_middleware(HttpMetricsMiddleware, metrics=service_metrics)
+
+profiler = SamplingProfiler(max_seconds=float(os.getenv("PROFILE_MAX_S", "300")))
+# 관리자 키가 없으면 미들웨어도 붙이지 않는다 (프로파일링을 쓰지 않을 때 요청 경로 비용 없음)
+# X-Profile: 1 + 관리자 X-API-Key 요청은 Server-Timing 헤더로 단계별 시간을 돌려준다
+if ADMIN_API_KEYS:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, admin_keys=ADMIN_API_KEYS)
 
 logger = get_logger("translate")
-translator = TranslateModel()
+TRANSLATE_MODEL = "translate-koen"
+
+result_cache = ResultCache(
+    max_items=int(os.getenv("CACHE_MAX_ITEMS", "10000")),
+    max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    default_ttl_s=float(os.getenv("CACHE_TTL_S", "0")) or None,
+    model_ttl_s=json.loads(os.getenv("CACHE_MODEL_TTL_S") or "{}")
+)
+
+emb_cache = EmbeddingCache(
+    max_items=int(os.getenv("EMB_CACHE_MAX_ITEMS", "100000")),
+    max_bytes=int(os.getenv("EMB_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+)
+
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH")
+disk_cache = DiskCache(CACHE_DB_PATH) if CACHE_DB_PATH else None
+
+infer_service = InferService(
+    registry,
+    cache=result_cache,
+    disk_cache=disk_cache,
+    max_cocurrency=int(os.getenv("INFER_MAX_CONCURRENCY", "6")),
+    max_batch_size=int(os.getenv("INFER_MAX_BATCH_SIZE", "16")),
+    max_wait_ms=float(os.getenv("INFER_MAX_WAIT_MS", "5")),
+    # 예: {"summarize": 2} -> summarize 는 동시에 최대 2 배치만 실행
+    model_concurrency=json.loads(os.getenv("INFER_MODEL_CONCURRENCY") or "{}"),
+    # 대화형 요청 대기열 상한 (모델별 값은 INFER_MODEL_MAX_QUEUE={"summarize": 64})
+    max_queue=int(os.getenv("INFER_MAX_QUEUE", "0")) or None,
+    model_max_queue=json.loads(os.getenv("INFER_MODEL_MAX_QUEUE") or "{}"),
+    metrics=service_metrics
+)
+INFER_DEFAULT_DEADLINE_MS = float(os.getenv("INFER_DEFAULT_DEADLINE_MS", "0"))
+
+def _deadline_s(request: Request, params: dict | None) -> tuple[float | None, dict | None]:
+    # 기한은 X-Deadline-Ms 헤더 또는 params.deadline_ms 로 받는다
+    # params 에서는 빼서 캐시 키에 섞이지 않게 한다
+    ms = request.headers.get("X-Deadline-Ms")
+    if params and "deadline_ms" in params:
+        params = dict(params)
+        ms = params.pop("deadline_ms")
+    try:
+        ms = float(ms) if ms is not None else INFER_DEFAULT_DEADLINE_MS
+    except (TypeError, ValueError):
+        raise HTTPException(400, detail="deadline_ms 는 숫자여야 합니다.")
+    return (ms / 1000 if ms > 0 else None), params
 
-infer_service = InferService(registry)
+def _overloaded(e: Overloaded) -> HTTPException:
+    return HTTPException(e.status_code, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+async def _load_model(model: str):
+    # 등록되지 않은 모델만 404, 로드 실패 (다운로드 / 메모리 부족 / 워커 프로세스) 는 503
+    try:
+        return await registry.aget(model)
+    except KeyError:
+        raise HTTPException(404, detail=f'모델 없음: {model}')
+    except ModelLoadError as e:
+        raise HTTPException(503, detail=str(e))
+
+async def _cancel_on_disconnect(request: Request, coro):
+    # 클라이언트가 연결을 끊으면 추론을 취소해 아무도 기다리지 않는 작업이 대기열에 남지 않게 한다
+    task = asyncio.ensure_future(coro)
+
+    async def _watch():
+        while True:
+            message = await request.receive()
+            if message["type"] == "http.disconnect":
+                return
+
+    watcher = asyncio.ensure_future(_watch())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+    if task.cancelled():
+        raise HTTPException(499, detail="클라이언트 연결 종료")
+    return task.result()
+
+registry.idle_unload_s = float(os.getenv("MODEL_IDLE_UNLOAD_MIN", "0")) * 60 or None
+# MODEL_BATCH_SIZE={"summarize": 4, "sentiment": 64} 처럼 모델별 파이프라인 배치 크기 (없으면 어댑터 기본값)
+registry.batch_sizes = json.loads(os.getenv("MODEL_BATCH_SIZE") or "{}")
+
+# STUB_MODELS=1 이면 실제 모델 대신 지연 시간만 흉내 내는 스텁 (adapters/stub.py) 을 쓴다
+# 지연 시간: STUB_LATENCY_MS + STUB_PER_ITEM_MS * 입력 수, 임베딩 차원: STUB_EMBED_DIM
+if os.getenv("STUB_MODELS") == "1":
+    registry.use_stubs()
+
+# INFER_PROCESS_MODELS=sentiment,summarize (또는 *) 이면 해당 모델은 전용 워커 프로세스에서 실행
+INFER_PROCESS_MODELS = [m.strip() for m in (os.getenv("INFER_PROCESS_MODELS") or "").split(",") if m.strip()]
+if INFER_PROCESS_MODELS == ["*"]:
+    INFER_PROCESS_MODELS = registry.list_model()
+if INFER_PROCESS_MODELS:
+    INFER_PROCS_PER_MODEL = int(os.getenv("INFER_PROCS_PER_MODEL", "1"))
+    # 기본값: 코어를 워커 프로세스 수로 나눠 스레드 과다 할당을 막는다
+    INFER_WORKER_THREADS = int(os.getenv("INFER_WORKER_THREADS", "0")) or max(
+        1, (os.cpu_count() or 1) // (len(INFER_PROCESS_MODELS) * INFER_PROCS_PER_MODEL)
+    )
+    # 워커 프로세스 수보다 많은 배치를 만들면 남는 배치가 전체 슬롯을 쥔 채 빈 워커를 기다리므로
+    # 동시 실행 배치 수를 프로세스 수로 맞춘다 (INFER_MODEL_CONCURRENCY 에 값이 있으면 그 값)
+    for name in registry.use_process_workers(INFER_PROCESS_MODELS, INFER_PROCS_PER_MODEL, INFER_WORKER_THREADS):
+        infer_service.model_concurrency.setdefault(name, INFER_PROCS_PER_MODEL)
+MODEL_PRELOAD = [m.strip() for m in (os.getenv("MODEL_PRELOAD") or "").split(",") if m.strip()]
+if MODEL_PRELOAD == ["*"]:
+    MODEL_PRELOAD = registry.list_model()
+
+_background_tasks: set[asyncio.Task] = set()
+
+@app.on_event("shutdown")
+async def _shutdown():
+    await job_manager.stop()
+    await infer_service.flush_disk_cache()
+    vec_store.close()
+    await asyncio.to_thread(registry.close)
+
+@app.on_event("startup")
+async def _startup():
+    # 모델 로드는 백그라운드에서 진행하고 /health 는 바로 응답한다
+    if MODEL_PRELOAD:
+        _background_tasks.add(asyncio.create_task(registry.warmup(MODEL_PRELOAD)))
+    if registry.idle_unload_s:
+        _background_tasks.add(asyncio.create_task(registry.run_idle_reaper(min(60.0, registry.idle_unload_s))))
+    # 재시작 전에 끝나지 않은 배치 작업은 여기서 이어서 처리된다
+    job_manager.start()
 
 @app.get("/health")
 def health_check():
@@ -60,45 +235,88 @@ def health_check():
         "uptime_s": round(time.time() - START_TIME, 2)
     }
 
+def _collect_service_metrics():
+    # 캐시 / 배치 작업 상태는 스크레이프 시점에 읽는다
+    caches = {"result": result_cache.stats(), "embedding": emb_cache.stats()}
+    jobs: dict[str, int] = {}
+    for job in job_manager.list_jobs():
+        jobs[job["status"]] = jobs.get(job["status"], 0) + 1
+    return [
+        ("cache_hits_total", "counter", "Cache hits", [({"cache": c}, s["hits"]) for c, s in caches.items()]),
+        ("cache_misses_total", "counter", "Cache misses", [({"cache": c}, s["misses"]) for c, s in caches.items()]),
+        ("cache_evictions_total", "counter", "Cache evictions", [({"cache": c}, s["evictions"]) for c, s in caches.items()]),
+        ("cache_items", "gauge", "Cached items", [({"cache": c}, s["items"]) for c, s in caches.items()]),
+        ("cache_bytes", "gauge", "Approximate cache size in bytes", [({"cache": c}, s["approx_bytes"]) for c, s in caches.items()]),
+        ("jobs", "gauge", "Batch jobs by status", [({"status": k}, v) for k, v in jobs.items()]),
+        ("process_uptime_seconds", "gauge", "Seconds since the API process started", [({}, time.time() - START_TIME)])
+    ]
+
+service_metrics.add_collector(_collect_service_metrics)
+
 @app.get("/metrics")
-def metrics():
-    cache_store = infer_service.cache._store
-    cache_items = len(cache_store)
-    uptime = round(time.time() - START_TIME, 2)
+def metrics(request: Request, format: Literal["json", "prometheus"] | None = None):
+    # Prometheus 스크레이퍼는 Accept 에 text/plain (또는 openmetrics) 를 보낸다
+    accept = request.headers.get("accept", "")
+    if format == "prometheus" or (format is None and ("text/plain" in accept or "openmetrics" in accept)):
+        return PlainTextResponse(service_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-    sample_keys = list(cache_store.keys())[:3]
-    sample_preview = [str(k) for k in sample_keys]
+    cache_stats = infer_service.cache.stats()
+    uptime = round(time.time() - START_TIME, 2)
 
     return {
         "status": "running",
         "uptime_s": uptime,
-        "cache_items": cache_items,
-        "cache_sample_keys": sample_preview,
-        "max_concurrency": infer_service.sema._value
+        "cache_items": cache_stats["items"],
+        "cache_sample_keys": infer_service.cache.sample_keys(3),
+        "cache": cache_stats,
+        "disk_cache": disk_cache.stats() if disk_cache else None,
+        "embedding_cache": emb_cache.stats(),
+        "coalesced": infer_service.coalesced,
+        "inflight": len(infer_service._inflight),
+        "models": registry.status(),
+        "max_concurrency": infer_service.sema._value,
+        "scheduler": infer_service.scheduler_stats(),
+        # ms 단위 count / avg / p50 / p90 / p99 (버킷 보간 근사값)
+        "latency": service_metrics.latency()
     }
 
 @app.delete("/clear_cache")
-def clear_cache():
-    cleared = len(infer_service.cache._store)
-    infer_service.cache._store.clear()
+def clear_cache(model: str | None = None, disk: bool = False):
+    cleared = infer_service.cache.clear(model=model)
+    disk_cleared = disk_cache.clear(model=model) if (disk and disk_cache) else 0
+    emb_cleared = emb_cache.clear(model=model)
     return {
         "status": "cleared",
-        "cleared_items": cleared
+        "model": model,
+        "cleared_items": cleared,
+        "embedding_cleared_items": emb_cleared,
+        "disk_cleared_items": disk_cleared
     }
 
 @app.post("/translate", response_model=TranslateResponse, summary="한영 번역")
-def translate(req: TranslateRequest):
+async def translate(req: TranslateRequest, request: Request, client: str = Depends(client_id)):
     text = req.text.strip()
     if not text:
         raise HTTPException(400, detail="텍스트가 비어있을 수 없습니다.")
 
     start = time.perf_counter()
+    deadline_s, _ = _deadline_s(request, None)
 
     try:
-        result = translator.translate(text=text, max_length=req.max_length or 256)
+        outputs = await _cancel_on_disconnect(request, infer_service.infer(
+            TRANSLATE_MODEL, [text], {"max_length": req.max_length or 256}, client=client, deadline_s=deadline_s
+        ))
+        result = [{"translation_text": o["text"]} for o in outputs]
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise _overloaded(e)
+    except ModelLoadError as e:
+        logger.exception(f"모델 로드 실패: {e}")
+        raise HTTPException(503, detail=str(e))
     except ValueError as ve:
         logger.exception(f"형식 에러: {ve}")
-        raise HTTPException(400, detail=ve)
+        raise HTTPException(400, detail=str(ve))
     except Exception as e:
         logger.exception(f"문제 발생: {e}")
         raise HTTPException(500, detail="번역 실패")
@@ -114,18 +332,27 @@ def list_models(_apikey: str = Security(require_api_key)):
     }
 
 @app.post("/v1/infer", response_model=InferResponse)
-async def infer(req: InferRequest):
+async def infer(req: InferRequest, request: Request, client: str = Depends(client_id)):
     if any((not t) or (not t.strip()) for t in req.inputs):
         raise HTTPException(400, detail="입력 텍스트 오류 발생")
+    deadline_s, params = _deadline_s(request, req.params)
 
     try:
-        outputs = await infer_service.infer(req.model, req.inputs, req.params)
+        outputs = await _cancel_on_disconnect(
+            request, infer_service.infer(req.model, req.inputs, params, req.priority, client, deadline_s)
+        )
         return {
             "model": req.model,
             "output": outputs
         }
     except KeyError:
         raise HTTPException(404, detail=f'모델 없음: {req.model}')
+    except ModelLoadError as e:
+        raise HTTPException(503, detail=str(e))
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise _overloaded(e)
 
     except Exception as e:
         raise HTTPException(500, detail=f'추론 실패: {e}')
@@ -134,140 +361,387 @@ from fastapi import Body
 
 @app.post("/v1/infer_detail")
 async def infer_detail(
+    request: Request,
     model: str = Body(..., embed=True),
     inputs: list[str] = Body(..., embed=True),
-    params: dict | None = Body(None, embed=True)
+    params: dict | None = Body(None, embed=True),
+    priority: Literal["interactive", "bulk"] = Body("interactive", embed=True),
+    client: str = Depends(client_id)
 ):
     
     if any((not t) or (not t.strip()) for t in inputs):
         raise HTTPException(400, detail="입력 텍스트 오류 발생")
+    deadline_s, params = _deadline_s(request, params)
     
     try:
-        result = await infer_service.infer_with_detail(model, inputs, params)
+        result = await _cancel_on_disconnect(
+            request, infer_service.infer_with_detail(model, inputs, params, priority, client, deadline_s)
+        )
         return result
     except KeyError:
         raise HTTPException(404, detail=f'모델 없음: {model}')
+    except ModelLoadError as e:
+        raise HTTPException(503, detail=str(e))
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(500, detail=f'추론 실패: {e}')
     
-async def _inputs_from_upload(file: UploadFile) -> tuple[list[str], str]:
-    raw = await file.read()
-    if not raw:
-        raise HTTPException(400, detail="빈 파일")
-    
-    text = raw.decode("utf-8", errors="replace")
-    name = (file.filename or "").lower()
-
-    if name.endswith(".csv"):
-        reader = csv.reader(io.StringIO(text))
-        inputs = [r[0].strip() for r in reader
-                  if r and isinstance(r[0], str) and r[0].strip()]
-        return inputs, "csv"
-    
-    elif name.endswith(".json"):
-        data = json.loads(text)
-        if isinstance(data, dict) and "inputs" in data:
-            array = data["inputs"]
-        elif isinstance(data, list):
-            array = data
-        else:
-            raise HTTPException(400, detail="지원하지 않는 json 구조")
-        inputs = [t.strip() for t in array
-                  if isinstance(t, str) and t.strip()]
-        return inputs, "json"
-    
-    else:
+UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", "256"))
+UPLOAD_FIRST_CHUNK_ROWS = int(os.getenv("UPLOAD_FIRST_CHUNK_ROWS", "16"))
+CSV_BLOCK_BYTES = int(os.getenv("CSV_BLOCK_BYTES", str(64 * 1024)))
+
+async def _open_upload(file: UploadFile) -> tuple[str, AsyncIterator[list[str]], list[str]]:
+    # 첫 청크까지만 미리 읽어서 형식 / 빈 파일 오류는 스트리밍 시작 전에 400 으로 돌려준다
+    ftype = upload_reader.file_type(file.filename)
+    if ftype is None:
         raise HTTPException(400, "지원하지 않는 형식")
-    
+    chunks = upload_reader.iter_upload(file, ftype, UPLOAD_CHUNK_ROWS, first_rows=UPLOAD_FIRST_CHUNK_ROWS)
+    try:
+        with stage("upload_parse"):
+            first = await anext(chunks, None)
+    except ValueError as ve:
+        raise HTTPException(400, detail=str(ve))
+    if not first:
+        raise HTTPException(400, detail="유효한 데이터 없음")
+    return ftype, chunks, first
+
+def _parse_params(params: str | None) -> dict | None:
+    try:
+        return json.loads(params) if params else None
+    except:
+        raise HTTPException(400, detail="parmas가 유효한 json 형식이 아닙니다.")
+
+async def _infer_chunks(
+    model: str,
+    first: list[str],
+    chunks: AsyncIterator[list[str]],
+    params: dict | None,
+    client: str
+) -> AsyncIterator[tuple[int, list[str], dict]]:
+    # 현재 청크를 내보내는 동안 다음 청크 추론을 미리 시작한다 (최대 한 청크 앞서감)
+    # 메모리에는 청크 두 개와 그 결과만 남는다
+    def _start(texts: list[str]) -> asyncio.Future:
+        # 업로드는 대량 작업이므로 대화형 요청 뒤에 처리
+        return asyncio.ensure_future(
+            infer_service.infer_with_detail(model=model, texts=texts, params=params, priority="bulk", client=client)
+        )
+
+    offset = 0
+    chunk = first
+    task = _start(chunk)
+    try:
+        while chunk:
+            detail = await task
+            task = None
+            parse_error = None
+            try:
+                nxt = await anext(chunks, None)
+            except ValueError as ve:
+                nxt, parse_error = None, ve
+            if nxt:
+                task = _start(nxt)
+            yield offset, chunk, detail
+            if parse_error is not None:
+                raise parse_error
+            offset += len(chunk)
+            chunk = nxt
+    finally:
+        # 클라이언트가 끊겨 제너레이터가 닫히면 미리 시작한 추론도 취소
+        if task is not None and not task.done():
+            task.cancel()
+
+class _CsvBlocks:
+    # csv.writer 가 쓰는 작은 버퍼. max_bytes 를 넘으면 모인 행들을 블록 하나로 꺼낸다
+    def __init__(self, max_bytes: int = 64 * 1024):
+        self.max_bytes = max_bytes
+        self._buf = io.StringIO()
+        self._w = csv.writer(self._buf)
+
+    def row(self, values: list[Any]) -> str | None:
+        self._w.writerow(values)
+        return self.flush() if self._buf.tell() >= self.max_bytes else None
+
+    def flush(self) -> str:
+        block = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return block
+
 @app.post("/v1/upload_infer")
 async def upload_infer(
     model: str = Form(...),
     file: UploadFile = File(...),
-    params: str | None = Form(None)
+    params: str | None = Form(None),
+    client: str = Depends(client_id)
 ):
-    inputs, ftype = await _inputs_from_upload(file)
-    if not inputs:
-        raise HTTPException(400, detail="유효한 데이터 없음")
-    parmas_obj = json.loads(params) if params else None
+    params_obj = _parse_params(params)
+    await _load_model(model)
+    ftype, chunks, first = await _open_upload(file)
+
+    # 결과 한 줄 = 입력 한 건, 마지막 줄 = 요약
+    # 스트리밍이라 Server-Timing 헤더에는 첫 청크 전 단계만 담기므로 X-Profile 요청은 요약 줄에 전체 단계를 붙인다
+    trace = current_trace.get()
+
+    async def _lines():
+        count = success = fail = 0
+        try:
+            async for offset, chunk, detail in _infer_chunks(model, first, chunks, params_obj, client):
+                errors = {e["index"]: e["error"] for e in detail["error"]}
+                lines = []
+                for i, text in enumerate(chunk):
+                    row = {"index": offset + i, "input": text}
+                    if i in errors:
+                        row["error"] = errors[i]
+                    else:
+                        row["output"] = detail["output"][i]
+                    lines.append(json.dumps(row, ensure_ascii=False))
+                count += detail["count"]
+                success += detail["success"]
+                fail += detail["fail"]
+                yield "\n".join(lines) + "\n"
+        except ValueError as ve:
+            yield json.dumps({"error": f"업로드 파싱 실패: {ve}"}, ensure_ascii=False) + "\n"
+        summary = {
+            "done": True,
+            "filename": file.filename,
+            "filetype": ftype,
+            "model": model,
+            "count": count,
+            "success": success,
+            "fail": fail
+        }
+        if trace is not None:
+            summary["profile"] = trace.summary()
+        yield json.dumps(summary, ensure_ascii=False) + "\n"
 
-    try:
-        detail = await infer_service.infer_with_detail(model=model, texts=inputs, params=parmas_obj)
-    except KeyError:
-        raise HTTPException(404, detail=f'모델 없음: {model}')
-    
-    return {
-        "filename": file.filename,
-        "filetype": ftype,
-        "model": detail["model"],
-        "count": detail["count"],
-        "success": detail["success"],
-        "fail": detail["fail"],
-        "output": detail["output"],
-        "errors": detail["error"]
-    }
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
 
 @app.post("/v1/upload_infer_csv")
 async def upload_infer_csv(
     model: str = Form(...),
     file: UploadFile = File(...),
-    params: str | None = Form(None)
+    params: str | None = Form(None),
+    client: str = Depends(client_id)
 ):
-    
-    inputs, _ = await _inputs_from_upload(file)
-    if not inputs:
-        raise HTTPException(400, detail="유효 텍스트 없음")
-    
-    try:
-        params_obj = json.loads(params) if params else None
-    except:
-        raise HTTPException(400, detail="parmas가 유효한 json 형식이 아닙니다.")
+    params_obj = _parse_params(params)
+    await _load_model(model)
+    _, chunks, first = await _open_upload(file)
+
+    async def _rows():
+        blocks = _CsvBlocks(CSV_BLOCK_BYTES)
+        # 헤더는 추론을 기다리지 않고 바로 내보낸다
+        blocks.row(["index", "input", "output", "error"])
+        yield blocks.flush()
+        try:
+            async for offset, chunk, detail in _infer_chunks(model, first, chunks, params_obj, client):
+                out = detail["output"]
+                errors = {
+                    e["index"]: e for e in detail["error"]
+                } if detail.get("error") else {}
+
+                for i, input in enumerate(chunk):
+                    err = errors.get(i)
+                    block = blocks.row([
+                        offset + i,
+                        input,
+                        out[i] if out[i] else "",
+                        err if err else ""
+                    ])
+                    if block:
+                        yield block
+                # 청크가 끝나면 남은 행을 바로 내보내 다음 청크를 기다리는 동안에도 전송되게 한다
+                block = blocks.flush()
+                if block:
+                    yield block
+        except ValueError as ve:
+            blocks.row(["", "", "", f"업로드 파싱 실패: {ve}"])
+            yield blocks.flush()
 
-    try:
-        detail = await infer_service.infer_with_detail(model=model, texts=inputs, params=params_obj)
-    except KeyError:
-        raise HTTPException(404, detail=f'모델 없음: {model}')
-    
-    buf = io.StringIO()
-    w = csv.writer(buf)
-    w.writerow(["index", "input", "output", "error"])
-
-    out = detail["output"]
-    errors = {
-        e["index"]: e for e in detail["error"]
-    } if detail.get("error") else {}
-
-    for i, input in enumerate(inputs):
-        err = errors.get(i)
-        w.writerow([
-            i,
-            input,
-            out[i] if out[i] else "",
-            err if err else ""
-        ])
-    buf.seek(0)
     filename = (file.filename or "result").rsplit(".", 1)[0] + "_result.csv"
     header = {
         "Content-Disposition": f'attachment; filename="{filename}"'
     }
-    return StreamingResponse(buf, media_type="text/csv; charset=utf-8", headers=header)
+    return StreamingResponse(_rows(), media_type="text/csv; charset=utf-8", headers=header)
+
+job_manager = JobManager(
+    os.getenv("JOB_DIR", "jobs"),
+    infer_service,
+    workers=int(os.getenv("JOB_WORKERS", "1")),
+    chunk_rows=UPLOAD_CHUNK_ROWS
+)
+
+async def _read_upload(file: UploadFile, size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    while True:
+        data = await file.read(size)
+        if not data:
+            break
+        yield data
+
+async def _one(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+@app.post("/v1/jobs")
+async def create_job(
+    model: str = Form(...),
+    file: UploadFile | None = File(None),
+    inputs: str | None = Form(None),
+    params: str | None = Form(None)
+):
+    params_obj = _parse_params(params)
+    await _load_model(model)
+
+    if file is not None:
+        ftype = upload_reader.file_type(file.filename)
+        if ftype is None:
+            raise HTTPException(400, "지원하지 않는 형식")
+        source = _read_upload(file)
+    elif inputs:
+        try:
+            array = json.loads(inputs)
+        except:
+            raise HTTPException(400, detail="inputs가 유효한 json 형식이 아닙니다.")
+        if not isinstance(array, list) or not array:
+            raise HTTPException(400, detail="inputs 는 비어있지 않은 배열이어야 합니다.")
+        ftype = "json"
+        source = _one(json.dumps({"inputs": array}, ensure_ascii=False).encode("utf-8"))
+    else:
+        raise HTTPException(400, detail="file 또는 inputs 가 필요합니다.")
+
+    return await job_manager.create(model, params_obj, ftype, source)
+
+@app.get("/v1/jobs")
+def list_jobs():
+    return {"jobs": job_manager.list_jobs()}
+
+def _job_or_404(job_id: str) -> dict:
+    info = job_manager.info(job_id)
+    if info is None:
+        raise HTTPException(404, detail=f"작업 없음: {job_id}")
+    return info
+
+@app.get("/v1/jobs/{job_id}")
+def get_job(job_id: str):
+    return _job_or_404(job_id)
+
+@app.get("/v1/jobs/{job_id}/results")
+async def get_job_results(job_id: str, offset: int = 0, limit: int = 1000):
+    info = _job_or_404(job_id)
+    if offset < 0 or not 0 < limit <= 10000:
+        raise HTTPException(400, detail="offset >= 0, 0 < limit <= 10000")
+    results = await asyncio.to_thread(job_manager.read_results, job_id, offset, limit)
+    return {
+        "id": job_id,
+        "status": info["status"],
+        "done": info["done"],
+        "offset": offset,
+        "results": results,
+        "next_offset": offset + len(results) if offset + len(results) < info["done"] else None
+    }
+
+@app.get("/v1/jobs/{job_id}/download")
+def download_job_results(job_id: str):
+    # FileResponse 는 Range 요청을 지원하므로 끊긴 다운로드를 이어받을 수 있다
+    _job_or_404(job_id)
+    path = job_manager.results_path(job_id)
+    if not os.path.exists(path):
+        raise HTTPException(404, detail="아직 결과가 없습니다.")
+    return FileResponse(path, media_type="application/x-ndjson", filename=f"{job_id}_result.ndjson")
+
+@app.post("/v1/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    _job_or_404(job_id)
+    return job_manager.cancel(job_id)
+
+@app.delete("/v1/jobs/{job_id}")
+def delete_job(job_id: str):
+    if not job_manager.delete(job_id):
+        raise HTTPException(404, detail=f"작업 없음: {job_id}")
+    return {"id": job_id, "deleted": True}
 
 @app.post("/v1/embeddings")
 async def embeddings(
     model: str = Body(..., embed=True),
     inputs: list[str] = Body(..., embed=True),
+    format: str = Body("float", embed=True),
+    dimensions: int | None = Body(None, embed=True),
     params: dict | None = Body(None, embed=True)
 ):
-    try:
-        adapter = registry.get(model)
-    except:
-        raise HTTPException(404, detail=f'잘못된 모델: {model}')
+    if format not in vec_codec.FORMATS:
+        raise HTTPException(400, detail=f"지원하지 않는 format: {format}")
+
+    adapter = await _load_model(model)
     
-    vectors = await asyncio.to_thread(adapter.embed, inputs)
+    with stage("embed"):
+        vectors = await emb_cache.embed(model, adapter, inputs)
+
+    try:
+        vectors = vec_codec.truncate(vectors, dimensions)
+        with stage("encode"):
+            data = await asyncio.to_thread(vec_codec.encode, vectors, format)
+    except ValueError as ve:
+        raise HTTPException(400, detail=str(ve))
 
     return {
         "model": model,
-        "count": len(vectors),
-        "vectors_preview": vectors[:2]
+        "count": len(data),
+        "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        "format": format,
+        "encoding": vec_codec.describe(format),
+        "vectors": data
+    }
+
+@app.post("/v1/vec/namespaces")
+def vec_create_namespace(
+    namespace: str = Body(..., embed=True),
+    index: str = Body("flat", embed=True),
+    index_params: dict | None = Body(None, embed=True),
+    dtype: str = Body("float32", embed=True),
+    rescore: bool = Body(False, embed=True)
+):
+    try:
+        ns = vec_store.create(namespace, index=index, index_params=index_params, dtype=dtype, rescore=rescore)
+    except ValueError as ve:
+        raise HTTPException(400, detail=str(ve))
+    return ns.info()
+
+@app.get("/v1/vec/namespaces")
+def vec_list_namespaces():
+    return {
+        "namespaces": vec_store.list_namespaces()
+    }
+
+@app.post("/v1/vec/rebuild")
+def vec_rebuild(namespace: str = Body(..., embed=True)):
+    ns = vec_store.get(namespace)
+    if ns is None:
+        raise HTTPException(404, detail=f'네임스페이스 없음: {namespace}')
+    if ns.index is None:
+        raise HTTPException(400, detail="flat 네임스페이스는 재구성할 인덱스가 없습니다.")
+    started = ns.rebuild_index(background=True)
+    return {
+        "namespace": namespace,
+        "started": started,
+        "index": ns.info()["index"]
+    }
+
+@app.post("/v1/vec/snapshot")
+def vec_snapshot(namespace: str | None = Body(None, embed=True)):
+    if namespace is None:
+        return {
+            "snapshotted": vec_store.snapshot_all()
+        }
+    ns = vec_store.get(namespace)
+    if ns is None:
+        raise HTTPException(404, detail=f'네임스페이스 없음: {namespace}')
+    if ns.storage is None:
+        raise HTTPException(400, detail="VEC_DATA_DIR 가 설정되지 않아 스냅샷을 만들 수 없습니다.")
+    return {
+        "namespace": namespace,
+        "snapshotted": ns.snapshot(),
+        "size": ns.count
     }
 
 @app.post("/v1/vec/upsert")
@@ -291,49 +765,97 @@ async def vec_upsert(
 
     if not valid_items:
         raise HTTPException(400, detail="유효한 텍스트가 없습니다.")
+    # 임베딩 전에 id / metadata 형식을 먼저 확인한다 (ns.upsert 도 WAL 기록 전에 다시 검사한다)
+    try:
+        check_ids([it.get("id") for it, _ in valid_items])
+    except ValueError as ve:
+        raise HTTPException(400, detail=str(ve))
+    if not all(isinstance(it.get("metadata") or {}, dict) for it, _ in valid_items):
+        raise HTTPException(400, detail="metadata 는 dict 여야 합니다.")
     
     texts = [s for _, s in valid_items]
 
-    try:
-        adapter = registry.get(model)
-    except Exception:
-        raise HTTPException(404, detail=f'모델 없음: {model}')
+    adapter = await _load_model(model)
 
-    vecs = await asyncio.to_thread(adapter.embed, texts)
+    with stage("embed"):
+        vecs = await emb_cache.embed(model, adapter, texts)
 
     if len(vecs) != len(texts):
         raise HTTPException(500, detail="임베딩 실패")
     
-    db = _VEC_DB.setdefault(namespace, [])
+    ns = await asyncio.to_thread(vec_store.get_or_create, namespace, vecs.shape[1])
     now = time.time()
 
-    id2idx = {e["id"]: i for i, e in enumerate(db)}
+    try:
+        with stage("upsert"):
+            added, updated = await asyncio.to_thread(
+                ns.upsert,
+                [it.get("id") for it, _ in valid_items],
+                texts,
+                vecs,
+                [it.get("metadata") or {} for it, _ in valid_items],
+                now
+            )
+    except ValueError as ve:
+        raise HTTPException(400, detail=str(ve))
 
-    added = 0
-    updated = 0
+    return {
+        "namespace": namespace,
+        "added": added,
+        "updated": updated,
+        "size": ns.count
+    }
 
-    for (it, s), v in zip(valid_items, vecs):
-        eid = it.get("id")
-        entry = {
-            "id": eid,
-            "text": s,
-            "vec": v,
-            "meta": it.get("metadata") or {},
-            "ts": now
-        }
-        if eid in id2idx:
-            db[id2idx[eid]] = entry
-            updated += 1
-        else:
-            db.append(entry)
-            id2idx[eid] = len(db) - 1
-            added += 1
+@app.post("/v1/vec/delete")
+async def vec_delete(
+    namespace: str = Body("default", embed=True),
+    ids: list[Any] = Body(..., embed=True)
+):
+    if not ids:
+        raise HTTPException(400, detail="ids 비어 있음.")
 
+    ns = await asyncio.to_thread(vec_store.get, namespace)
+    if ns is None:
+        raise HTTPException(404, detail=f'네임스페이스 없음: {namespace}')
+
+    try:
+        deleted = await asyncio.to_thread(ns.delete, ids)
+    except ValueError as ve:
+        raise HTTPException(400, detail=str(ve))
+    return {
+        "namespace": namespace,
+        "deleted": deleted,
+        "size": ns.count
+    }
+
+@app.post("/v1/vec/update_metadata")
+async def vec_update_metadata(
+    namespace: str = Body("default", embed=True),
+    items: list[dict] = Body(..., embed=True),
+    replace: bool = Body(False, embed=True)
+):
+    if not items:
+        raise HTTPException(400, detail="items 비어 있음.")
+    if any("id" not in it or not isinstance(it.get("metadata") or {}, dict) for it in items):
+        raise HTTPException(400, detail="각 항목에는 id 와 metadata(dict) 가 필요합니다.")
+
+    ns = await asyncio.to_thread(vec_store.get, namespace)
+    if ns is None:
+        raise HTTPException(404, detail=f'네임스페이스 없음: {namespace}')
+
+    try:
+        updated, missing = await asyncio.to_thread(
+            ns.update_metadata,
+            [it["id"] for it in items],
+            [it.get("metadata") or {} for it in items],
+            replace
+        )
+    except ValueError as ve:
+        raise HTTPException(400, detail=str(ve))
     return {
         "namespace": namespace,
-        "added": added,
         "updated": updated,
-        "size": len(db)
+        "missing": missing
     }
 
 @app.post("/v1/vec/query")
@@ -342,39 +864,127 @@ async def vec_query(
     namespace: str = Body("default", embed=True),
     query: str = Body(..., embed=True),
     top_k: int = Body(5, embed=True),
+    exact: bool = Body(False, embed=True),
+    filter: dict | None = Body(None, embed=True),
     params: dict | None = Body(None, embed=True)
 ):
     q = query.strip()
     if not q:
         raise HTTPException(400, detail="query 비어 있음")
     
-    db = _VEC_DB.get(namespace, [])
-    if not db:
+    ns = await asyncio.to_thread(vec_store.get, namespace)
+    if ns is None or ns.count == 0:
         return {
             "namespace": namespace,
             "query": q,
             "matches": []
         }
 
-    try:
-        adapter = registry.get(model)
-    except:
-        raise HTTPException(404, detail=f'모델 없음: {model}')
+    adapter = await _load_model(model)
     
-    qv =  (await asyncio.to_thread(adapter.embed, [q]))[0]
-
-    scored = [{
-        "id": e["id"],
-        "text": e["text"],
-        "score": _cos(qv, e["vec"]),
-        "metadata": e["meta"]
-    } for e in db]
+    with stage("embed"):
+        qv = (await emb_cache.embed(model, adapter, [q]))[0]
+    if qv.shape[0] != ns.dim:
+        raise HTTPException(400, detail=f"벡터 차원 불일치: {qv.shape[0]} != {ns.dim}")
 
-    scored.sort(key=lambda x: x["score"], reverse=True)
+    nprobe = (params or {}).get("nprobe")
+    rescore_k = (params or {}).get("rescore_k")
+    try:
+        with stage("search"):
+            matches = await asyncio.to_thread(ns.query, qv, top_k, exact, nprobe, filter, rescore_k)
+    except ValueError as ve:
+        raise HTTPException(400, detail=str(ve))
 
     return {
         "namespace": namespace,
         "query": q,
         "top_k": top_k,
-        "matches": scored[:top_k]
-    }
\ No newline at end of file
+        "exact": exact or ns.index is None,
+        "filter": filter,
+        "matches": matches
+    }
+
+
+@app.post("/v1/vec/query_batch")
+async def vec_query_batch(
+    model: str = Body(..., embed=True),
+    namespace: str = Body("default", embed=True),
+    queries: list[str] = Body(..., embed=True),
+    top_k: int = Body(5, embed=True),
+    exact: bool = Body(False, embed=True),
+    filter: dict | None = Body(None, embed=True),
+    params: dict | None = Body(None, embed=True)
+):
+    qs = [q.strip() for q in queries]
+    if not qs or any(not q for q in qs):
+        raise HTTPException(400, detail="queries 비어 있음")
+
+    ns = await asyncio.to_thread(vec_store.get, namespace)
+    if ns is None or ns.count == 0:
+        return {
+            "namespace": namespace,
+            "top_k": top_k,
+            "results": [{"query": q, "matches": []} for q in qs]
+        }
+
+    adapter = await _load_model(model)
+
+    with stage("embed"):
+        qvs = await emb_cache.embed(model, adapter, qs)
+    if qvs.shape[1] != ns.dim:
+        raise HTTPException(400, detail=f"벡터 차원 불일치: {qvs.shape[1]} != {ns.dim}")
+
+    nprobe = (params or {}).get("nprobe")
+    rescore_k = (params or {}).get("rescore_k")
+    try:
+        with stage("search"):
+            hits = await asyncio.to_thread(ns.query_batch, qvs, top_k, exact, nprobe, filter, rescore_k)
+    except ValueError as ve:
+        raise HTTPException(400, detail=str(ve))
+
+    return {
+        "namespace": namespace,
+        "top_k": top_k,
+        "exact": exact or ns.index is None,
+        "results": [{"query": q, "matches": matches} for q, matches in zip(qs, hits)]
+    }
+
+@app.post("/admin/profile/start")
+async def admin_profile_start(
+    seconds: float | None = Body(None, embed=True),
+    requests: int | None = Body(None, embed=True),
+    interval_ms: float = Body(5.0, embed=True),
+    wait: bool = Body(False, embed=True),
+    _admin: str = Security(require_admin_key)
+):
+    # seconds 초 동안 또는 다음 requests 개 요청이 끝날 때까지 샘플링 (먼저 도달하는 쪽)
+    # wait=true 면 끝날 때까지 기다렸다가 collapsed stack 을 바로 돌려준다
+    if (seconds is not None and seconds <= 0) or (requests is not None and requests <= 0):
+        raise HTTPException(400, detail="seconds, requests 는 0 보다 커야 합니다.")
+    if interval_ms < 0.5:
+        raise HTTPException(400, detail="interval_ms 는 0.5 이상이어야 합니다.")
+    try:
+        status = profiler.start(seconds, requests, interval_ms)
+    except ProfilerBusy as e:
+        raise HTTPException(409, detail=str(e))
+    if not wait:
+        return status
+    await asyncio.to_thread(profiler.join)
+    return PlainTextResponse(profiler.collapsed())
+
+@app.get("/admin/profile")
+def admin_profile_status(_admin: str = Security(require_admin_key)):
+    return profiler.status()
+
+@app.post("/admin/profile/stop")
+async def admin_profile_stop(_admin: str = Security(require_admin_key)):
+    return await asyncio.to_thread(profiler.stop)
+
+@app.get("/admin/profile/collapsed")
+def admin_profile_collapsed(_admin: str = Security(require_admin_key)):
+    # flamegraph.pl / speedscope / inferno 에 그대로 넣을 수 있는 "frame;frame;... count" 형식
+    if profiler.session is None:
+        raise HTTPException(404, detail="프로파일링 결과가 없습니다.")
+    if profiler.running:
+        raise HTTPException(409, detail="프로파일링 중입니다. 끝난 뒤 조회하거나 /admin/profile/stop 을 호출하세요.")
+    return PlainTextResponse(profiler.collapsed())
@@ -0,0 +1,125 @@
+from typing import Dict, List
+import numpy as np
+
+# 프로세스 내 IVF-flat 근사 최근접 이웃 인덱스
+# 정규화된 벡터 기준으로 구면 k-means 로 nlist 개 중심을 학습하고,
+# 질의 시 가까운 nprobe 개 리스트의 후보만 정확히 채점한다.
+class IVFFlatIndex:
+    kind = "ivf"
+
+    def __init__(
+        self,
+        nlist: int = 256,
+        nprobe: int = 8,
+        min_train_size: int | None = None,
+        kmeans_iters: int = 10,
+        train_sample: int = 50000,
+        seed: int = 0
+    ):
+        self.nlist = max(1, int(nlist))
+        self.nprobe = max(1, int(nprobe))
+        self.min_train_size = int(min_train_size) if min_train_size else self.nlist * 39
+        self.kmeans_iters = int(kmeans_iters)
+        self.train_sample = int(train_sample)
+        self.seed = seed
+
+        self.centroids: np.ndarray | None = None
+        self.trained_size = 0
+        self._lists: List[List[int]] = []
+        self._arrays: List[np.ndarray | None] = []
+        self._row_list: Dict[int, int] = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vecs: np.ndarray) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        n = len(vecs)
+        sample = vecs if n <= self.train_sample else vecs[rng.choice(n, self.train_sample, replace=False)]
+        sample = np.asarray(sample, dtype=np.float32)
+        k = min(self.nlist, len(sample))
+        cent = sample[rng.choice(len(sample), k, replace=False)].copy()
+
+        for _ in range(self.kmeans_iters):
+            assign = np.argmax(sample @ cent.T, axis=1)
+            sums = np.zeros_like(cent)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=k)
+            empty = counts == 0
+            sums[empty] = cent[empty]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            cent = sums / norms
+        return cent.astype(np.float32)
+
+    @staticmethod
+    def assign(vecs: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        out = np.empty(len(vecs), dtype=np.int64)
+        for s in range(0, len(vecs), chunk):
+            out[s:s + chunk] = np.argmax(vecs[s:s + chunk] @ centroids.T, axis=1)
+        return out
+
+    def reset(self, centroids: np.ndarray, rows: np.ndarray, assign: np.ndarray):
+        self.centroids = centroids
+        self.trained_size = len(rows)
+        self._lists = [[] for _ in range(len(centroids))]
+        self._row_list = {}
+        for r, l in zip(rows.tolist(), assign.tolist()):
+            self._lists[l].append(r)
+            self._row_list[r] = l
+        self._arrays = [None] * len(centroids)
+
+    def add(self, rows: List[int], vecs: np.ndarray):
+        if not self.is_trained or not len(rows):
+            return
+        self.remove(rows)
+        assign = self.assign(np.asarray(vecs, dtype=np.float32), self.centroids)
+        for r, l in zip(rows, assign.tolist()):
+            self._lists[l].append(r)
+            self._row_list[r] = l
+            self._arrays[l] = None
+
+    def remove(self, rows: List[int]):
+        for r in rows:
+            l = self._row_list.pop(r, None)
+            if l is not None:
+                self._lists[l].remove(r)
+                self._arrays[l] = None
+
+    def _list_array(self, l: int) -> np.ndarray:
+        arr = self._arrays[l]
+        if arr is None:
+            arr = np.asarray(self._lists[l], dtype=np.int64)
+            self._arrays[l] = arr
+        return arr
+
+    def candidates(self, qv: np.ndarray, nprobe: int | None = None) -> np.ndarray:
+        nprobe = min(max(1, int(nprobe or self.nprobe)), len(self.centroids))
+        cscores = self.centroids @ qv
+        probe = np.argpartition(-cscores, nprobe - 1)[:nprobe] if nprobe < len(cscores) else np.arange(len(cscores))
+        parts = [self._list_array(int(l)) for l in probe]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def info(self) -> Dict[str, object]:
+        sizes = [len(l) for l in self._lists]
+        return {
+            "kind": self.kind,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "trained": self.is_trained,
+            "trained_size": self.trained_size,
+            "indexed": len(self._row_list),
+            "max_list_size": max(sizes) if sizes else 0
+        }
+
+def build_index(kind: str | None, params: dict | None):
+    kind = (kind or "flat").lower()
+    if kind == "flat":
+        return None
+    if kind == "ivf":
+        try:
+            return IVFFlatIndex(**(params or {}))
+        except TypeError as e:
+            raise ValueError(f"잘못된 인덱스 파라미터: {e}")
+    raise ValueError(f"지원하지 않는 인덱스: {kind}")
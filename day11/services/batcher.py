@@ -0,0 +1,367 @@
+from typing import Any, Deque, Dict, List, Tuple
+from collections import OrderedDict, deque
+import asyncio
+import math
+import time
+
+from .metrics import Metrics
+from .profiling import StageTrace, current_trace
+
+# 요청 우선순위. 숫자가 작을수록 먼저 처리된다
+PRIORITIES = {"interactive": 0, "bulk": 1}
+_PRIORITY_NAMES = {v: k for k, v in PRIORITIES.items()}
+
+def priority_value(priority: str | int | None) -> int:
+    if priority is None:
+        return PRIORITIES["interactive"]
+    if isinstance(priority, int):
+        return priority
+    if priority not in PRIORITIES:
+        raise ValueError(f"지원하지 않는 priority: {priority} (가능: {', '.join(PRIORITIES)})")
+    return PRIORITIES[priority]
+
+# 과부하로 요청을 받지 않거나 기한을 넘긴 경우. status_code 는 HTTP 응답 코드로 그대로 쓴다
+class Overloaded(Exception):
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class QueueFull(Overloaded):
+    status_code = 429
+
+class DeadlineExceeded(Overloaded):
+    status_code = 503
+
+# (text, future, 대기 시작 시각, 기한(loop 시각) 또는 None, X-Profile 요청이면 StageTrace)
+_Item = Tuple[str, asyncio.Future, float, float | None, StageTrace | None]
+_Batch = List[Tuple[str, asyncio.Future, StageTrace | None]]
+
+# 모델 하나에 대한 동적 마이크로 배칭 큐 + 스케줄러
+# 캐시 miss 를 (priority, params) 그룹에 모아두고, 모델별 동시 실행 슬롯이 비면
+#   1) 우선순위가 가장 높은 그룹 중
+#   2) max_batch_size 가 찼거나 max_wait_ms 가 지난 가장 오래된 그룹을 골라
+#   3) 클라이언트(API 키)별로 한 건씩 돌아가며 꺼내 배치를 만든다 (fair queuing)
+# 슬롯이 찬 동안에는 배치를 만들지 않으므로 나중에 온 높은 우선순위 요청이 먼저 나간다.
+class MicroBatcher:
+    def __init__(
+        self,
+        adapter,
+        sema: asyncio.Semaphore,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        max_concurrency: int | None = None,
+        max_queue: int | None = None,
+        global_slots: int | None = None,
+        model: str = "",
+        metrics: Metrics | None = None
+    ):
+        self.adapter = adapter
+        self.model = model
+        # 모든 모델이 공유하는 전체 동시 실행 상한
+        self.sema = sema
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.global_slots = global_slots or sema._value
+        # 이 모델만의 동시 실행 상한 (기본값 = 전체 상한). 슬롯이 빌 때만 배치를 만들어야
+        # 우선순위 / 공정 큐잉 / 대기열 상한이 의미를 가진다
+        self.max_concurrency = max(1, int(max_concurrency or self.global_slots))
+        self.active = 0
+        # 대화형 요청 대기열 상한 (대량 작업은 호출 측이 청크 단위로 스스로 조절한다)
+        self.max_queue = max(1, int(max_queue)) if max_queue else None
+        # 배치 하나의 predict 시간 지수이동평균 (예상 대기 시간 계산용)
+        self.batch_time: float | None = None
+
+        self._groups: Dict[Tuple[int, str], "OrderedDict[str, Deque[_Item]]"] = {}
+        self._sizes: Dict[Tuple[int, str], int] = {}
+        self._since: Dict[Tuple[int, str], float] = {}
+        self._params: Dict[str, dict] = {}
+        # 아직 배치로 꺼내지 않은 future -> (그룹 키, 클라이언트) (취소 시 대기열 개수에서 빼고, 기한 / 우선순위를 바꾸기 위해)
+        self._queued: Dict[asyncio.Future, Tuple[Tuple[int, str], str]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.rejected = {"queue_full": 0, "deadline": 0, "expired": 0}
+        # 우선순위별 최근 대기 시간(초) 창
+        self._waits: Dict[int, Deque[float]] = {}
+
+        m = metrics or Metrics()
+        self._m_queue_wait = m.stage_seconds.labels(model, "queue_wait")
+        self._m_slot_wait = m.stage_seconds.labels(model, "slot_wait")
+        self._m_predict = m.stage_seconds.labels(model, "predict")
+        self._m_batch_size = m.batch_size.labels(model)
+        self._m_errors = m.infer_errors
+
+    def enqueue(
+        self,
+        text: str,
+        params: dict | None,
+        pkey: str,
+        priority: int = 0,
+        client: str = "",
+        deadline: float | None = None
+    ) -> asyncio.Future:
+        # 대기열에 넣고 결과 future 를 돌려준다. 취소하면 대기열에서 빠진다
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+
+        self._add((priority, pkey), client, (text, fut, loop.time(), deadline, current_trace.get()), params or {})
+        fut.add_done_callback(self._dequeue)
+
+        self._pump()
+        return fut
+
+    def _add(self, key: Tuple[int, str], client: str, item: _Item, params: dict):
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = OrderedDict()
+            self._sizes[key] = 0
+            self._since[key] = item[2]
+        else:
+            self._since[key] = min(self._since[key], item[2])
+        group.setdefault(client, deque()).append(item)
+        self._sizes[key] += 1
+        self._queued[item[1]] = (key, client)
+        self._params[key[1]] = params
+
+    def _trim(self, key: Tuple[int, str]):
+        # 항목을 꺼낸 뒤 그룹의 대기 시작 시각을 갱신하고, 빈 그룹은 지운다
+        group = self._groups[key]
+        if group:
+            self._since[key] = min(items[0][2] for items in group.values())
+        else:
+            del self._groups[key], self._sizes[key], self._since[key]
+            if not any(k[1] == key[1] for k in self._groups):
+                self._params.pop(key[1], None)
+
+    def _dequeue(self, fut: asyncio.Future):
+        # 배치로 꺼내기 전에 끝난 (호출자가 떠나 취소된) 항목은 대기열 개수에서 바로 빼고, 배치를 만들 때 건너뛴다
+        entry = self._queued.pop(fut, None)
+        if entry is not None and entry[0] in self._sizes:
+            self._sizes[entry[0]] -= 1
+
+    def set_deadline(self, fut: asyncio.Future, deadline: float | None):
+        # 아직 대기 중인 항목의 기한을 바꾼다 (single-flight 로 합류한 호출자의 기한 반영)
+        entry = self._queued.get(fut)
+        if entry is None:
+            return
+        key, client = entry
+        items = self._groups[key][client]
+        for i, (text, f, t0, _, trace) in enumerate(items):
+            if f is fut:
+                items[i] = (text, f, t0, deadline, trace)
+                return
+
+    def promote(self, fut: asyncio.Future, priority: int):
+        # 아직 대기 중인 항목을 더 높은 우선순위 그룹으로 옮긴다
+        # (대량 작업이 먼저 넣은 입력에 대화형 요청이 single-flight 로 합류한 경우)
+        entry = self._queued.get(fut)
+        if entry is None or priority >= entry[0][0]:
+            return
+        key, client = entry
+        group = self._groups[key]
+        items = group[client]
+        item = next((it for it in items if it[1] is fut), None)
+        if item is None:
+            return
+        items.remove(item)
+        if not items:
+            del group[client]
+        self._sizes[key] -= 1
+        params = self._params.get(key[1], {})
+        self._trim(key)
+        self._add((priority, key[1]), client, item, params)
+        self._pump()
+
+    def _ahead(self, priority: int) -> int:
+        return sum(size for (prio, _), size in self._sizes.items() if prio <= priority)
+
+    def estimate_wait(self, priority: int, n: int = 1) -> float:
+        # (앞선 항목 + 새 항목) 을 배치로 나눠 동시 실행 슬롯 수만큼씩 처리한다고 보고 계산
+        if self.batch_time is None:
+            return 0.0
+        slots = min(self.max_concurrency, self.global_slots) or 1
+        batches = math.ceil((self._ahead(priority) + n) / self.max_batch_size)
+        running = 1 if self.active >= slots else 0
+        return (math.ceil(batches / slots) + running) * self.batch_time
+
+    def admit(self, priority: int, n: int, deadline_s: float | None = None):
+        # 받을 수 없는 요청은 대기열에 넣기 전에 바로 거절한다
+        if self.max_queue is not None and priority == PRIORITIES["interactive"]:
+            ahead = self._ahead(priority)
+            # 대기열이 비어 있으면 상한보다 큰 요청도 받는다 (영원히 거절되지 않도록)
+            if ahead and ahead + n > self.max_queue:
+                self.rejected["queue_full"] += 1
+                raise QueueFull(
+                    f"대기열이 가득 찼습니다 (max_queue={self.max_queue})",
+                    retry_after=max(1.0, self.estimate_wait(priority))
+                )
+        if deadline_s is not None:
+            est = self.estimate_wait(priority, n)
+            if est > deadline_s:
+                self.rejected["deadline"] += 1
+                raise DeadlineExceeded(
+                    f"예상 대기 {est * 1000:.0f}ms 가 기한 {deadline_s * 1000:.0f}ms 를 넘습니다",
+                    retry_after=max(1.0, est)
+                )
+
+    def _full(self) -> bool:
+        return self.active >= self.max_concurrency
+
+    def _ready(self, now: float) -> Tuple[int, str] | None:
+        best = None
+        for key, since in self._since.items():
+            if self._sizes[key] < self.max_batch_size and now - since < self.max_wait:
+                continue
+            if best is None or (key[0], since) < (best[0], self._since[best]):
+                best = key
+        return best
+
+    def _take(self, key: Tuple[int, str], now: float) -> _Batch:
+        group = self._groups[key]
+        batch: _Batch = []
+        waits = self._waits.setdefault(key[0], deque(maxlen=1024))
+        taken = 0
+        while group and len(batch) < self.max_batch_size:
+            client, items = next(iter(group.items()))
+            text, fut, t0, deadline, trace = items.popleft()
+            if items:
+                group.move_to_end(client)
+            else:
+                del group[client]
+            # 기다리던 호출자가 이미 끊긴 항목은 건너뛴다 (_dequeue 가 아직 돌지 않았으면 여기서 센다)
+            if fut.done():
+                if self._queued.pop(fut, None) is not None:
+                    taken += 1
+                continue
+            self._queued.pop(fut, None)
+            taken += 1
+            if deadline is not None and now > deadline:
+                # 대기 중 기한이 지난 항목은 실행하지 않는다
+                self.rejected["expired"] += 1
+                self._fail(fut, DeadlineExceeded("대기 중 기한이 지났습니다"))
+                continue
+            batch.append((text, fut, trace))
+            waits.append(now - t0)
+            self._m_queue_wait.observe(now - t0)
+            if trace is not None:
+                trace.add("queue_wait", now - t0)
+
+        self._sizes[key] -= taken
+        self._trim(key)
+        return batch
+
+    def _pump(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+
+        while self._groups and not self._full():
+            key = self._ready(now)
+            if key is None:
+                break
+            params = self._params.get(key[1], {})
+            batch = self._take(key, now)
+            if not batch:
+                continue
+            self.active += 1
+            task = loop.create_task(self._run(batch, params))
+            self._tasks.add(task)
+            task.add_done_callback(self._done)
+
+        # 슬롯이 남아 있으면 가장 먼저 max_wait 에 도달하는 그룹 시각에 다시 확인
+        if self._groups and not self._full():
+            self._timer = loop.call_at(min(self._since.values()) + self.max_wait, self._pump)
+
+    def _done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self.active -= 1
+        self._pump()
+
+    async def _run(self, batch: _Batch, params: dict):
+        t_slot = time.perf_counter()
+        async with self.sema:
+            slot_wait = time.perf_counter() - t_slot
+            self._m_slot_wait.observe(slot_wait)
+            # 전체 슬롯을 기다리는 동안 떠난 호출자의 항목은 뺀다
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                return
+            traces = [tr for _, _, tr in batch if tr is not None]
+            texts = [t for t, _, _ in batch]
+            self.batches += 1
+            self.items += len(texts)
+            self._m_batch_size.observe(len(texts))
+            try:
+                t0 = time.perf_counter()
+                out = await asyncio.to_thread(self.adapter.predict, inputs=texts, params=params)
+                elapsed = time.perf_counter() - t0
+                self.batch_time = elapsed if self.batch_time is None else 0.8 * self.batch_time + 0.2 * elapsed
+                self._m_predict.observe(elapsed)
+                for tr in traces:
+                    tr.add("slot_wait", slot_wait)
+                    tr.add("predict", elapsed)
+                if not isinstance(out, list) or len(out) != len(texts):
+                    raise RuntimeError("배치 결과 개수 불일치")
+            except Exception as e:
+                if len(batch) == 1:
+                    self._fail(batch[0][1], e)
+                    return
+                # 배치 중 하나의 입력 때문에 전체가 실패하지 않도록 개별 재시도
+                out = await asyncio.to_thread(self._predict_each, texts, params)
+
+        for (_, fut, _), r in zip(batch, out):
+            if isinstance(r, Exception):
+                self._fail(fut, r)
+            elif not fut.done():
+                fut.set_result(r)
+
+    def _fail(self, fut: asyncio.Future, e: Exception):
+        if not fut.done():
+            self._m_errors.labels(self.model, type(e).__name__).inc()
+            fut.set_exception(e)
+
+    def _predict_each(self, texts: List[str], params: dict) -> List[Any]:
+        results: List[Any] = []
+        for t in texts:
+            try:
+                out = self.adapter.predict(inputs=[t], params=params)
+                results.append(out[0] if isinstance(out, list) and out else out)
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth: Dict[str, int] = {}
+        for (prio, _), size in self._sizes.items():
+            name = _PRIORITY_NAMES.get(prio, str(prio))
+            depth[name] = depth.get(name, 0) + size
+        return depth
+
+    def stats(self) -> Dict[str, Any]:
+        waits = {}
+        for prio, recent in self._waits.items():
+            if not recent:
+                continue
+            ordered = sorted(recent)
+            waits[_PRIORITY_NAMES.get(prio, str(prio))] = {
+                "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2)
+            }
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queue_depth(),
+            "wait": waits,
+            "batches": self.batches,
+            "batch_time_ms": round(self.batch_time * 1000, 2) if self.batch_time is not None else None,
+            "max_queue": self.max_queue,
+            "rejected": dict(self.rejected),
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,123 @@
+from typing import Any, Dict, Tuple
+from collections import OrderedDict
+import json
+import sys
+import threading
+import time
+
+CacheKey = Tuple[str, str, str]
+
+def _approx_size(key: CacheKey, value: Any) -> int:
+    size = sum(sys.getsizeof(k) for k in key)
+    try:
+        size += len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        size += sys.getsizeof(value)
+    return size
+
+# 항목 수 / 대략적인 바이트 상한, 모델별 TTL 을 갖는 LRU 결과 캐시
+class ResultCache:
+    def __init__(
+        self,
+        max_items: int = 10000,
+        max_bytes: int = 256 * 1024 * 1024,
+        default_ttl_s: float | None = None,
+        model_ttl_s: Dict[str, float] | None = None
+    ):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.default_ttl_s = default_ttl_s
+        self.model_ttl_s = dict(model_ttl_s or {})
+
+        # key -> (value, size, expires_at)
+        self._store: "OrderedDict[CacheKey, Tuple[Any, int, float | None]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl(self, model: str) -> float | None:
+        return self.model_ttl_s.get(model, self.default_ttl_s) or None
+
+    def _remove(self, key: CacheKey):
+        _, size, _ = self._store.pop(key)
+        self._bytes -= size
+
+    def get(self, key: CacheKey) -> Any | None:
+        with self._lock:
+            item = self._store.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, _, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._store.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _size(self, key: CacheKey, value: Any) -> int:
+        return _approx_size(key, value)
+
+    def put(self, key: CacheKey, value: Any, ttl_s: float | None = None):
+        # ttl_s: 모델 TTL 대신 쓸 남은 수명 (디스크 캐시에서 올린 값은 디스크에 기록된 시각 기준)
+        size = self._size(key, value)
+        if size > self.max_bytes:
+            return
+        ttl = ttl_s if ttl_s is not None else self.ttl(key[0])
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+            self._store[key] = (value, size, expires_at)
+            self._bytes += size
+
+            while self._store and (len(self._store) > self.max_items or self._bytes > self.max_bytes):
+                old_key = next(iter(self._store))
+                self._remove(old_key)
+                self.evictions += 1
+
+    def clear(self, model: str | None = None) -> int:
+        with self._lock:
+            if model is None:
+                cleared = len(self._store)
+                self._store.clear()
+                self._bytes = 0
+                return cleared
+            keys = [k for k in self._store if k[0] == model]
+            for k in keys:
+                self._remove(k)
+            return len(keys)
+
+    def sample_keys(self, n: int = 3) -> list[str]:
+        with self._lock:
+            return [str(k) for _, k in zip(range(n), reversed(self._store))]
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_model: Dict[str, int] = {}
+            for k in self._store:
+                per_model[k[0]] = per_model.get(k[0], 0) + 1
+            lookups = self.hits + self.misses
+            return {
+                "items": len(self._store),
+                "approx_bytes": self._bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "per_model": per_model
+            }
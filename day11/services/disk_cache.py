@@ -0,0 +1,101 @@
+from typing import Any, Dict, List, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 메모리 캐시 뒤에 두는 2차 캐시 (SQLite 파일)
+# WAL 모드라 같은 호스트의 여러 uvicorn 워커가 동시에 읽고 쓸 수 있다.
+class DiskCache:
+    def __init__(self, path: str, timeout_s: float = 5.0):
+        self.path = path
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                model TEXT NOT NULL,
+                model_used TEXT NOT NULL,
+                text TEXT NOT NULL,
+                params TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, model_used, text, params)
+            )
+        """)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 연결은 스레드 간 공유할 수 없으므로 to_thread 워커 스레드마다 따로 연다
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout_s)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(
+        self, model: str, model_used: str, texts: List[str], params_key: str, max_age_s: float | None = None
+    ) -> Dict[str, Tuple[Any, float]]:
+        # text -> (값, 기록 시각). max_age_s 가 있으면 그보다 오래된 항목은 없는 것으로 본다 (메모리 캐시 TTL 과 같은 기준)
+        if not texts:
+            return {}
+        conn = self._conn()
+        found: Dict[str, Tuple[Any, float]] = {}
+        uniq = list(dict.fromkeys(texts))
+        min_created = time.time() - max_age_s if max_age_s else 0.0
+        # SQLite 바인딩 변수 개수 제한(기본 999)을 넘지 않도록 나눠서 조회
+        for start in range(0, len(uniq), 500):
+            chunk = uniq[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                "SELECT text, value, created_at FROM results "
+                f"WHERE model=? AND model_used=? AND params=? AND created_at>=? AND text IN ({marks})",
+                [model, model_used, params_key, min_created, *chunk]
+            ).fetchall()
+            for text, value, created_at in rows:
+                found[text] = (json.loads(value), created_at)
+        return found
+
+    def put(self, model: str, model_used: str, text: str, params_key: str, value: Any):
+        self.put_many([(model, model_used, text, params_key, value)])
+
+    def put_many(self, rows: List[Tuple[str, str, str, str, Any]]):
+        # (model, model_used, text, params_key, value) 여러 건을 트랜잭션 한 번으로 쓴다
+        if not rows:
+            return
+        conn = self._conn()
+        now = time.time()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                [(m, mu, t, pk, json.dumps(v, ensure_ascii=False), now) for m, mu, t, pk, v in rows]
+            )
+            conn.commit()
+        except sqlite3.OperationalError:
+            # 다른 워커가 오래 잠근 경우 캐시 쓰기는 포기한다
+            conn.rollback()
+
+    def clear(self, model: str | None = None) -> int:
+        conn = self._conn()
+        if model is None:
+            cur = conn.execute("DELETE FROM results")
+        else:
+            cur = conn.execute("DELETE FROM results WHERE model=?", (model,))
+        conn.commit()
+        return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        rows = conn.execute("SELECT model, COUNT(*) FROM results GROUP BY model").fetchall()
+        return {
+            "path": self.path,
+            "items": sum(n for _, n in rows),
+            "per_model": {m: n for m, n in rows}
+        }
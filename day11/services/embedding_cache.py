@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, Tuple
+import asyncio
+import sys
+import numpy as np
+
+from .cache import ResultCache
+
+# (model, text) -> float32 벡터 캐시. 파이썬 float 리스트 대신 연속된 float32 배열로 보관한다.
+class EmbeddingCache(ResultCache):
+    def _size(self, key: Tuple[str, str], value: np.ndarray) -> int:
+        return sum(sys.getsizeof(k) for k in key) + value.nbytes + 112
+
+    def put(self, key: Tuple[str, str], value: Any):
+        arr = np.array(value, dtype=np.float32, copy=True)
+        arr.setflags(write=False)
+        super().put(key, arr)
+
+    async def embed(self, model: str, adapter, texts: List[str]) -> np.ndarray:
+        # 캐시에 없는 텍스트만 (중복 제거 후) 한 번에 임베딩한다
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        for t in dict.fromkeys(texts):
+            v = self.get((model, t))
+            if v is not None:
+                found[t] = v
+            else:
+                missing.append(t)
+
+        if missing:
+            vecs = await asyncio.to_thread(adapter.embed_array, missing)
+            if len(vecs) != len(missing):
+                raise RuntimeError("임베딩 결과 개수 불일치")
+            for t, v in zip(missing, vecs):
+                self.put((model, t), v)
+                found[t] = v
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[t] for t in texts]).astype(np.float32, copy=False)
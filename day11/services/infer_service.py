@@ -1,39 +1,136 @@
-from typing import Any, Dict, Tuple, List
+from typing import Any, Dict, Iterator, Tuple, List
+import contextlib
 import json
 import asyncio
+import time
 
-class _ResultCache:
-    def __init__(self):
-        self._store: Dict[Tuple[str, str, str], Any] = {}
-
-    def get(self, key: Tuple[str, str, str]) -> Any | None:
-        return self._store.get(key)
-    
-    def put(self, key: Tuple[str, str, str], value: Any):
-        self._store[key] = value
+from .batcher import DeadlineExceeded, MicroBatcher, priority_value
+from .cache import ResultCache
+from .disk_cache import DiskCache
+from .metrics import Metrics
+from .profiling import current_trace
 
 def _params_key(params: dict | None) -> str:
     return json.dumps(params or {}, ensure_ascii=False, sort_keys=True)
 
+def _model_used(model: str, adapter) -> str:
+    return getattr(adapter, "model_used", None) or getattr(adapter, "model_name", None) or model
+
+class _Flight:
+    # single-flight 로 묶인 계산 하나. 대기 중인 항목의 기한은 남아 있는 호출자 중 가장 늦은 기한
+    # (기한 없는 호출자가 하나라도 있으면 None) 으로 맞춰, 먼저 온 호출자의 짧은 기한 때문에
+    # 나중에 합류한 호출자까지 실패하지 않게 한다. 우선순위는 합류한 호출자 중 가장 높은 쪽으로 올린다
+    def __init__(self, task: asyncio.Task, batcher: MicroBatcher, fut: asyncio.Future, priority: int):
+        self.task = task
+        self.batcher = batcher
+        self.fut = fut
+        self.priority = priority
+        self.deadlines: List[float | None] = []
+
+    def _sync_deadline(self):
+        if self.deadlines:
+            latest = None if None in self.deadlines else max(self.deadlines)
+            self.batcher.set_deadline(self.fut, latest)
+
+    def join(self, deadline: float | None, priority: int):
+        self.deadlines.append(deadline)
+        self._sync_deadline()
+        if priority < self.priority:
+            self.priority = priority
+            self.batcher.promote(self.fut, priority)
+
+    def leave(self, deadline: float | None) -> int:
+        # 남은 호출자 수를 돌려준다
+        self.deadlines.remove(deadline)
+        self._sync_deadline()
+        return len(self.deadlines)
+
 class InferService:
-    def __init__(self, registry, max_cocurrency: int = 6):
+    def __init__(
+        self,
+        registry,
+        max_cocurrency: int = 6,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        cache: ResultCache | None = None,
+        disk_cache: DiskCache | None = None,
+        model_concurrency: Dict[str, int] | None = None,
+        max_queue: int | None = None,
+        model_max_queue: Dict[str, int] | None = None,
+        metrics: Metrics | None = None
+    ):
         self.registry = registry
-        self.cache = _ResultCache()
+        # ResultCache 는 __len__ 이 있어 비어 있으면 거짓이므로 None 과 비교한다
+        self.cache = cache if cache is not None else ResultCache()
+        self.disk_cache = disk_cache
         self.sema = asyncio.Semaphore(max_cocurrency)
+        self.max_cocurrency = max_cocurrency
+        # 모델별 동시 실행 상한. 느린 모델이 전체 슬롯을 다 차지하지 못하게 한다
+        self.model_concurrency = dict(model_concurrency or {})
+        # 모델별 대화형 대기열 상한. 넘치면 대기열에 넣지 않고 바로 429
+        self.max_queue = max_queue
+        self.model_max_queue = dict(model_max_queue or {})
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._inflight: Dict[Tuple[str, str, str], _Flight] = {}
+        self._disk_pending: List[Tuple[str, str, str, str, Any]] = []
+        self._disk_task: asyncio.Task | None = None
+        self.coalesced = 0
+        self.abandoned = 0
+        self.metrics = metrics or Metrics()
+        self.metrics.add_collector(self._collect)
 
-    async def _predict_one(self, adapter, text: str, params: dict | None):
-        async with self.sema:
-            out = await asyncio.to_thread(adapter.predict, inputs=[text], params=params or {})
-        return out[0] if isinstance(out, list) and out else out
-    
-    async def infer(self, model: str, texts: List[str], params: dict | None):
+    def _batcher(self, model: str, adapter) -> MicroBatcher:
+        b = self._batchers.get(model)
+        if b is None or b.adapter is not adapter:
+            b = MicroBatcher(
+                adapter,
+                self.sema,
+                self.max_batch_size,
+                self.max_wait_ms,
+                max_concurrency=self.model_concurrency.get(model),
+                max_queue=self.model_max_queue.get(model, self.max_queue),
+                global_slots=self.max_cocurrency,
+                model=model,
+                metrics=self.metrics
+            )
+            self._batchers[model] = b
+        return b
+
+    async def _predict_and_cache(self, model: str, adapter, text: str, pkey: str, fut: asyncio.Future):
+        val = await fut
+        self.cache.put((model, text, pkey), val)
+        if self.disk_cache is not None:
+            self._disk_put((model, _model_used(model, adapter), text, pkey, val))
+        return val
+
+    def _disk_put(self, row: Tuple[str, str, str, str, Any]):
+        # 디스크 캐시 쓰기는 결과를 기다리는 호출자를 막지 않는다.
+        # 같은 루프 회차에 끝난 결과 (보통 배치 하나) 를 모아 executemany 한 번으로 쓴다
+        self._disk_pending.append(row)
+        if self._disk_task is None:
+            self._disk_task = asyncio.ensure_future(self._flush_disk())
+
+    async def _flush_disk(self):
         try:
-            adapter = self.registry.get(model)
-        except Exception:
-            raise KeyError(model)
-        
-        pkey = _params_key(params)
+            while self._disk_pending:
+                rows, self._disk_pending = self._disk_pending, []
+                try:
+                    await asyncio.to_thread(self.disk_cache.put_many, rows)
+                except Exception:
+                    pass
+        finally:
+            self._disk_task = None
+
+    async def flush_disk_cache(self):
+        # 종료 전에 남은 디스크 캐시 쓰기를 마친다
+        task = self._disk_task
+        if task is not None:
+            await task
 
+    async def _lookup(self, model: str, adapter, texts: List[str], pkey: str):
+        t0 = time.perf_counter()
         hits: List[Tuple[int, Any]] = []
         misses: List[Tuple[int, str]] = []
 
@@ -44,11 +141,135 @@ class InferService:
             else:
                 misses.append((idx, t))
 
-        tasks = [self._predict_one(adapter, t, params) for _, t in misses]
-        new_results: List[Any] = await asyncio.gather(*tasks) if tasks else []
+        mem_hits = len(hits)
+        if misses and self.disk_cache is not None:
+            # 디스크 캐시도 메모리 캐시와 같은 모델별 TTL 을 따른다
+            ttl = self.cache.ttl(model)
+            try:
+                found = await asyncio.to_thread(
+                    self.disk_cache.get_many, model, _model_used(model, adapter), [t for _, t in misses], pkey, ttl
+                )
+            except Exception:
+                found = {}
+            if found:
+                now = time.time()
+                remain: List[Tuple[int, str]] = []
+                for idx, t in misses:
+                    if t in found:
+                        val, created_at = found[t]
+                        # 메모리에는 디스크에 기록된 시각 기준으로 남은 TTL 동안만 둔다
+                        self.cache.put((model, t, pkey), val, max(0.001, ttl - (now - created_at)) if ttl else None)
+                        hits.append((idx, val))
+                    else:
+                        remain.append((idx, t))
+                misses = remain
+
+        m = self.metrics
+        elapsed = time.perf_counter() - t0
+        m.stage_seconds.labels(model, "cache_lookup").observe(elapsed)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add("cache_lookup", elapsed)
+            trace.count("cache_hit", len(hits))
+            trace.count("cache_miss", len(misses))
+        m.cache_requests.labels(model, "hit").inc(mem_hits)
+        if len(hits) > mem_hits:
+            m.cache_requests.labels(model, "disk_hit").inc(len(hits) - mem_hits)
+        m.cache_requests.labels(model, "miss").inc(len(misses))
+        return hits, misses
+
+    def _inflight_done(self, key: Tuple[str, str, str], flight: "_Flight"):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        # 기다리던 호출자가 모두 끊긴 경우에도 "exception was never retrieved" 경고가 나지 않도록
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    async def _compute(
+        self, model: str, adapter, text: str, params: dict | None, pkey: str,
+        priority: int = 0, client: str = "", deadline: float | None = None
+    ):
+        # 같은 (model, text, params) 가 이미 계산 중이면 그 결과를 함께 기다린다 (single-flight)
+        key = (model, text, pkey)
+        flight = self._inflight.get(key)
+        if flight is None:
+            batcher = self._batcher(model, adapter)
+            fut = batcher.enqueue(text, params, pkey, priority, client, deadline)
+            task = asyncio.ensure_future(self._predict_and_cache(model, adapter, text, pkey, fut))
+            flight = self._inflight[key] = _Flight(task, batcher, fut, priority)
+            task.add_done_callback(lambda t: self._inflight_done(key, flight))
+        else:
+            self.coalesced += 1
+            self.metrics.cache_requests.labels(model, "coalesced").inc()
+            trace = current_trace.get()
+            if trace is not None:
+                trace.count("coalesced")
+
+        flight.join(deadline, priority)
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            if not flight.leave(deadline) and not flight.task.done():
+                # 기다리는 호출자가 모두 떠났으면 (연결 끊김 / 기한 초과) 대기열에서 빼낸다
+                # 이미 predict 중인 배치는 끝까지 돌고 결과는 캐시에 남는다
+                flight.task.cancel()
+                self.abandoned += 1
+    
+    def _admit(self, model: str, adapter, prio: int, n: int, deadline_s: float | None) -> float | None:
+        # 캐시 miss 가 있을 때만 대기열 상한 / 예상 대기 시간을 확인하고, 기한을 loop 시각으로 바꿔 돌려준다
+        if not n:
+            return None
+        self._batcher(model, adapter).admit(prio, n, deadline_s)
+        return asyncio.get_running_loop().time() + deadline_s if deadline_s is not None else None
+
+    async def _gather(self, aws: List[Any], deadline: float | None) -> List[Any]:
+        # 하나가 실패하거나 기한이 지나면 나머지도 취소해 대기열에서 빼낸다
+        try:
+            async with asyncio.timeout_at(deadline):
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [tg.create_task(a) for a in aws]
+        except TimeoutError:
+            raise DeadlineExceeded("처리 중 기한이 지났습니다")
+        except BaseExceptionGroup as eg:
+            raise eg.exceptions[0]
+        return [t.result() for t in tasks]
+
+    @contextlib.contextmanager
+    def _timed(self, model: str) -> Iterator[None]:
+        # 모델별 처리 시간 / 동시 처리 수. 없는 모델 이름으로 라벨이 늘어나지 않게 어댑터를 얻은 뒤에 잰다
+        gauge = self.metrics.infer_in_flight.labels(model)
+        gauge.inc()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            gauge.dec()
+            elapsed = time.perf_counter() - t0
+            self.metrics.infer_seconds.labels(model).observe(elapsed)
+            trace = current_trace.get()
+            if trace is not None:
+                trace.add("infer", elapsed)
+
+    async def infer(
+        self,
+        model: str,
+        texts: List[str],
+        params: dict | None,
+        priority: str | int | None = None,
+        client: str = "",
+        deadline_s: float | None = None
+    ):
+        prio = priority_value(priority)
+        # 없는 모델은 KeyError, 로드 실패는 ModelLoadError 그대로 올린다
+        adapter = await self.registry.aget(model)
 
-        for (idx, t), r in zip(misses, new_results):
-            self.cache.put((model, t, pkey), r)
+        with self._timed(model):
+            pkey = _params_key(params)
+            hits, misses = await self._lookup(model, adapter, texts, pkey)
+            deadline = self._admit(model, adapter, prio, len(misses), deadline_s)
+
+            tasks = [self._compute(model, adapter, t, params, pkey, prio, client, deadline) for _, t in misses]
+            new_results: List[Any] = await self._gather(tasks, deadline) if tasks else []
 
         outputs: List[Any] = [None] * len(texts)
         for i, val in hits:
@@ -58,35 +279,32 @@ class InferService:
 
         return outputs
     
-    async def infer_with_detail(self, model: str, texts: List[str], params: dict | None):
-        try:
-            adapter = self.registry.get(model)
-        except:
-            raise KeyError(model)
-        
-        pkey = _params_key(params)
+    async def infer_with_detail(
+        self,
+        model: str,
+        texts: List[str],
+        params: dict | None,
+        priority: str | int | None = None,
+        client: str = "",
+        deadline_s: float | None = None
+    ):
+        prio = priority_value(priority)
+        # 없는 모델은 KeyError, 로드 실패는 ModelLoadError 그대로 올린다
+        adapter = await self.registry.aget(model)
 
-        hits: List[Tuple[int, Any]] = []
-        misses: List[Tuple[int, str]] = []
+        with self._timed(model):
+            pkey = _params_key(params)
+            hits, misses = await self._lookup(model, adapter, texts, pkey)
+            deadline = self._admit(model, adapter, prio, len(misses), deadline_s)
 
-        for idx, t in enumerate(texts):
-            c = self.cache.get((model, t, pkey))
-            if c is not None:
-                hits.append((idx, c))
-            else:
-                misses.append((idx, t))
-
-        async def _safe(idx: int, text: str):
-            async with self.sema:
+            async def _safe(idx: int, text: str):
                 try:
-                    out = await asyncio.to_thread(adapter.predict, inputs=[text], params=params or {})
-                    val = out[0] if isinstance(out, list) and out else out
-                    self.cache.put((model, text, pkey), val)
+                    val = await self._compute(model, adapter, text, params, pkey, prio, client, deadline)
                     return (idx, val, None)
                 except Exception as e:
                     return (idx, None, str(e))
-                
-        results = await asyncio.gather(*[_safe(i, t) for i, t in misses]) if misses else []
+
+            results = await self._gather([_safe(i, t) for i, t in misses], deadline) if misses else []
 
         outputs = [None] * len(texts)
         errors = []
@@ -115,5 +333,27 @@ class InferService:
             "error": errors
         }
 
-        
+    def scheduler_stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.sema._value,
+            "abandoned": self.abandoned,
+            "models": {model: b.stats() for model, b in self._batchers.items()}
+        }
 
+    def _collect(self):
+        # /metrics 스크레이프 시점에 읽는 스케줄러 상태
+        queued, active, rejected = [], [], []
+        for model, b in self._batchers.items():
+            for prio, n in b.queue_depth().items():
+                queued.append(({"model": model, "priority": prio}, n))
+            active.append(({"model": model}, b.active))
+            for reason, n in b.rejected.items():
+                rejected.append(({"model": model, "reason": reason}, n))
+        return [
+            ("infer_queue_depth", "gauge", "Inputs waiting in the micro-batch queue", queued),
+            ("infer_active_batches", "gauge", "Batches currently running per model", active),
+            ("infer_rejected_total", "counter", "Requests rejected by admission control", rejected),
+            ("infer_singleflight_keys", "gauge", "Distinct inputs being computed (single-flight)", [({}, len(self._inflight))]),
+            ("infer_free_slots", "gauge", "Free global concurrency slots", [({}, self.sema._value)]),
+            ("infer_abandoned_total", "counter", "Queued work cancelled because every caller left", [({}, self.abandoned)])
+        ]
@@ -0,0 +1,318 @@
+from typing import Any, AsyncIterator, Dict, List
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import numpy as np
+
+from .upload_reader import iter_upload
+
+# 배치 작업 디스크 레이아웃
+#   {root}/{job_id}/job.json        상태 / 진행률 (청크마다 원자적으로 갱신)
+#   {root}/{job_id}/input.{ext}     업로드 원본 (스트리밍으로 저장)
+#   {root}/{job_id}/results.ndjson  입력 한 건당 결과 한 줄
+#   {root}/{job_id}/results.idx     각 결과 줄의 끝 바이트 위치 (uint64) -> 페이지 조회 / 재시작 지점
+# 재시작 시 queued / running 작업은 results.idx 에 기록된 행 다음부터 이어서 처리한다.
+
+ACTIVE = ("queued", "running")
+
+class _AsyncFile:
+    # iter_upload 가 기대하는 await read(n) 인터페이스 + 읽은 위치
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        self.size = os.path.getsize(path)
+
+    async def read(self, n: int) -> bytes:
+        return await asyncio.to_thread(self._f.read, n)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def close(self):
+        self._f.close()
+
+class JobManager:
+    def __init__(self, root_dir: str, infer_service, workers: int = 1, chunk_rows: int = 256):
+        self.root_dir = root_dir
+        self.infer_service = infer_service
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: asyncio.Queue[str] | None = None
+        self._tasks: List[asyncio.Task] = []
+        # 상태 전이와 job.json 쓰기를 묶는 락. 청크 진행률 저장은 스레드에서 돌기 때문에 threading.Lock
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str, *parts: str) -> str:
+        return os.path.join(self.root_dir, job_id, *parts)
+
+    def _save(self, job: Dict[str, Any]):
+        with self._lock:
+            self._write(job)
+
+    def _write(self, job: Dict[str, Any]):
+        path = self._path(job["id"], "job.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            # _ 로 시작하는 키는 이번 실행에서만 쓰는 값 (처리 속도 계산용)
+            json.dump({k: v for k, v in job.items() if not k.startswith("_")}, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    # ---------- 수명 주기 ----------
+
+    def start(self):
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._queue = asyncio.Queue()
+        pending = []
+        for job_id in os.listdir(self.root_dir):
+            try:
+                with open(self._path(job_id, "job.json"), encoding="utf-8") as f:
+                    job = json.load(f)
+            except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+                continue
+            self._jobs[job_id] = job
+            if job["status"] in ACTIVE:
+                job["status"] = "queued"
+                pending.append(job)
+        # 재시작 전에 들어온 순서대로 이어서 처리
+        for job in sorted(pending, key=lambda j: j["created_at"]):
+            self._queue.put_nowait(job["id"])
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        # 진행 중인 작업은 running 상태로 남겨 다음 기동 때 이어서 처리한다
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ---------- 생성 / 조회 ----------
+
+    async def create(self, model: str, params: dict | None, ftype: str, source: AsyncIterator[bytes]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        ext = "jsonl" if ftype == "ndjson" else ftype
+        os.makedirs(self._path(job_id))
+        try:
+            size = 0
+            with open(self._path(job_id, f"input.{ext}"), "wb") as f:
+                async for data in source:
+                    await asyncio.to_thread(f.write, data)
+                    size += len(data)
+        except BaseException:
+            shutil.rmtree(self._path(job_id), ignore_errors=True)
+            raise
+
+        job = {
+            "id": job_id,
+            "model": model,
+            "params": params,
+            "filetype": ftype,
+            "input_file": f"input.{ext}",
+            "input_bytes": size,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "done": 0,
+            "success": 0,
+            "fail": 0,
+            "total": None,
+            "read_bytes": 0,
+            "error": None
+        }
+        self._save(job)
+        self._jobs[job_id] = job
+        self._queue.put_nowait(job_id)
+        return self.info(job_id)
+
+    def info(self, job_id: str) -> Dict[str, Any] | None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        out = {k: v for k, v in job.items() if not k.startswith("_")}
+        if job["total"]:
+            out["progress"] = round(job["done"] / job["total"], 4)
+        elif job["input_bytes"]:
+            out["progress"] = round(job["read_bytes"] / job["input_bytes"], 4)
+        else:
+            out["progress"] = 0.0
+        run_rows, run_started = job.get("_run_rows", 0), job.get("_run_started")
+        if run_started and job["status"] == "running":
+            elapsed = time.time() - run_started
+            rate = run_rows / elapsed if elapsed > 0 else 0.0
+            out["rows_per_s"] = round(rate, 2)
+            if job["total"] is None and job["read_bytes"] and rate:
+                # 전체 행 수를 모르면 읽은 바이트 비율로 남은 시간을 추정
+                remaining = elapsed * (job["input_bytes"] - job["read_bytes"]) / job["read_bytes"]
+                out["eta_s"] = round(remaining, 1)
+            elif job["total"] and rate:
+                out["eta_s"] = round((job["total"] - job["done"]) / rate, 1)
+        return out
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        jobs = sorted(self._jobs.values(), key=lambda j: j["created_at"], reverse=True)
+        return [self.info(j["id"]) for j in jobs]
+
+    def cancel(self, job_id: str) -> Dict[str, Any] | None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            if job["status"] in ACTIVE:
+                # 실행 중이면 현재 청크가 끝난 뒤 멈춘다
+                job["status"] = "cancelled"
+                job["finished_at"] = time.time()
+                self._write(job)
+        return self.info(job_id)
+
+    def delete(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job["status"] in ACTIVE:
+            self.cancel(job_id)
+        del self._jobs[job_id]
+        shutil.rmtree(self._path(job_id), ignore_errors=True)
+        return True
+
+    # ---------- 결과 ----------
+
+    def results_path(self, job_id: str) -> str:
+        return self._path(job_id, "results.ndjson")
+
+    def _offsets(self, job_id: str) -> np.ndarray:
+        path = self._path(job_id, "results.idx")
+        if not os.path.exists(path) or os.path.getsize(path) < 8:
+            return np.zeros(0, dtype="<u8")
+        return np.memmap(path, dtype="<u8", mode="r", shape=(os.path.getsize(path) // 8,))
+
+    def read_results(self, job_id: str, offset: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        ends = self._offsets(job_id)
+        n = len(ends)
+        if offset >= n or limit <= 0:
+            return []
+        stop = min(offset + limit, n)
+        start_byte = int(ends[offset - 1]) if offset > 0 else 0
+        end_byte = int(ends[stop - 1])
+        with open(self.results_path(job_id), "rb") as f:
+            f.seek(start_byte)
+            data = f.read(end_byte - start_byte)
+        # splitlines 는 문자열 안의 U+2028 등에서도 잘리므로 \n 으로만 나눈다
+        return [json.loads(line) for line in data.decode("utf-8").split("\n") if line]
+
+    def _recover(self, job_id: str) -> tuple[int, int]:
+        # 마지막으로 idx 에 기록된 행까지만 유효. 그 뒤에 쓰다 만 결과는 잘라낸다
+        # job.json 의 success / fail 은 idx 보다 늦게 저장되므로 남은 행을 다시 세어 (행 수, 실패 수) 를 돌려준다
+        idx_path = self._path(job_id, "results.idx")
+        res_path = self.results_path(job_id)
+        if os.path.exists(idx_path):
+            whole = os.path.getsize(idx_path) // 8 * 8
+            with open(idx_path, "r+b") as f:
+                f.truncate(whole)
+        ends = self._offsets(job_id)
+        done = len(ends)
+        end_byte = int(ends[-1]) if done else 0
+        del ends
+        fail = 0
+        if os.path.exists(res_path):
+            with open(res_path, "r+b") as f:
+                f.truncate(end_byte)
+                f.seek(0)
+                for line in f:
+                    fail += "error" in json.loads(line)
+        return done, fail
+
+    # ---------- 실행 ----------
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                with self._lock:
+                    if job["status"] != "running":
+                        continue
+                    job["status"] = "failed"
+                    job["error"] = str(e)
+                    job["finished_at"] = time.time()
+                    self._write(job)
+
+    async def _run(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        done, fail = await asyncio.to_thread(self._recover, job_id)
+        with self._lock:
+            if job["status"] != "queued":
+                return
+            job.update(status="running", done=done, success=done - fail, fail=fail, error=None,
+                       _run_rows=0, _run_started=time.time())
+            job["started_at"] = job["started_at"] or time.time()
+            self._write(job)
+
+        src = _AsyncFile(self._path(job_id, job["input_file"]))
+        seen = 0
+        try:
+            with open(self.results_path(job_id), "ab") as out, open(self._path(job_id, "results.idx"), "ab") as idx:
+                pos = out.tell()
+                async for chunk in iter_upload(src, job["filetype"], self.chunk_rows):
+                    job["read_bytes"] = src.tell()
+                    start = seen
+                    seen += len(chunk)
+                    if seen <= done:
+                        continue
+                    if start < done:
+                        chunk = chunk[done - start:]
+                        start = done
+
+                    detail = await self.infer_service.infer_with_detail(
+                        job["model"], chunk, job["params"], priority="bulk", client=f"job:{job_id}"
+                    )
+                    if job["status"] != "running":
+                        return
+
+                    errors = {e["index"]: e["error"] for e in detail["error"]}
+                    buf, ends = [], []
+                    for i, text in enumerate(chunk):
+                        row = {"index": start + i, "input": text}
+                        if i in errors:
+                            row["error"] = errors[i]
+                        else:
+                            row["output"] = detail["output"][i]
+                        line = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+                        buf.append(line)
+                        pos += len(line)
+                        ends.append(pos)
+                    await asyncio.to_thread(_append, out, idx, b"".join(buf), np.asarray(ends, dtype="<u8"))
+
+                    done = start + len(chunk)
+                    job["done"] = done
+                    job["success"] += detail["success"]
+                    job["fail"] += detail["fail"]
+                    job["_run_rows"] += len(chunk)
+                    await asyncio.to_thread(self._save, job)
+        finally:
+            src.close()
+
+        with self._lock:
+            # 마지막 청크를 쓰는 동안 들어온 취소가 done 으로 덮이지 않게 같은 락 안에서 다시 확인
+            if job["status"] != "running":
+                return
+            job.update(status="done", total=seen, read_bytes=job["input_bytes"], finished_at=time.time())
+            self._write(job)
+
+def _append(out, idx, data: bytes, ends: np.ndarray):
+    # 결과를 먼저 쓰고 idx 를 나중에 써야 idx 가 가리키는 행은 항상 완전하다
+    out.write(data)
+    out.flush()
+    idx.write(ends.tobytes())
+    idx.flush()
@@ -0,0 +1,163 @@
+from typing import Any, Dict, List, Tuple
+import numpy as np
+
+_RANGE_OPS = ("gt", "gte", "lt", "lte")
+_SCALAR = (str, int, float, bool)
+
+def _key(v: Any) -> Tuple[bool, Any]:
+    # True == 1 이 같은 키가 되지 않도록 bool 여부를 함께 둔다
+    return (isinstance(v, bool), v)
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+# {"lang": "ko", "tenant": {"in": [1, 2]}, "ts": {"gte": 1700000000}} -> [(field, op, value), ...]
+def parse_filter(expr: Dict[str, Any] | None) -> List[Tuple[str, str, Any]]:
+    if not expr:
+        return []
+    if not isinstance(expr, dict):
+        raise ValueError("filter 는 객체여야 합니다.")
+
+    conds: List[Tuple[str, str, Any]] = []
+    for field, cond in expr.items():
+        if isinstance(cond, dict):
+            if not cond:
+                raise ValueError(f"빈 조건: {field}")
+            for op, val in cond.items():
+                if op == "eq":
+                    if not isinstance(val, _SCALAR):
+                        raise ValueError(f"eq 값은 스칼라여야 합니다: {field}")
+                    conds.append((field, "in", [val]))
+                elif op == "in":
+                    if not isinstance(val, list) or not all(isinstance(v, _SCALAR) for v in val):
+                        raise ValueError(f"in 값은 스칼라 리스트여야 합니다: {field}")
+                    conds.append((field, "in", val))
+                elif op in _RANGE_OPS:
+                    if not _is_number(val):
+                        raise ValueError(f"{op} 값은 숫자여야 합니다: {field}")
+                    conds.append((field, op, float(val)))
+                else:
+                    raise ValueError(f"지원하지 않는 연산자: {op}")
+        elif isinstance(cond, _SCALAR):
+            conds.append((field, "in", [cond]))
+        else:
+            raise ValueError(f"지원하지 않는 조건: {field}")
+    return conds
+
+# 메타데이터 필드 하나에 대한 역색인(값 -> 행 집합) + 숫자 컬럼
+class FieldIndex:
+    def __init__(self, field: str):
+        self.field = field
+        self._rows: Dict[Tuple[bool, Any], set[int]] = {}
+        self._arrays: Dict[Tuple[bool, Any], np.ndarray] = {}
+        self._numeric = np.full(0, np.nan, dtype=np.float64)
+
+    def add(self, row: int, meta: Dict[str, Any] | None):
+        v = (meta or {}).get(self.field)
+        if not isinstance(v, _SCALAR):
+            return
+        k = _key(v)
+        self._rows.setdefault(k, set()).add(row)
+        self._arrays.pop(k, None)
+        if _is_number(v):
+            if row >= len(self._numeric):
+                grown = np.full(max(row + 1, len(self._numeric) * 2, 1024), np.nan, dtype=np.float64)
+                grown[:len(self._numeric)] = self._numeric
+                self._numeric = grown
+            self._numeric[row] = float(v)
+
+    def remove(self, row: int, meta: Dict[str, Any] | None):
+        v = (meta or {}).get(self.field)
+        if not isinstance(v, _SCALAR):
+            return
+        k = _key(v)
+        rows = self._rows.get(k)
+        if rows is not None:
+            rows.discard(row)
+            if not rows:
+                del self._rows[k]
+        self._arrays.pop(k, None)
+        if _is_number(v) and row < len(self._numeric):
+            self._numeric[row] = np.nan
+
+    def _value_rows(self, v: Any) -> np.ndarray:
+        k = _key(v)
+        arr = self._arrays.get(k)
+        if arr is None:
+            arr = np.fromiter(self._rows.get(k, ()), dtype=np.int64)
+            self._arrays[k] = arr
+        return arr
+
+    def in_mask(self, values: List[Any], n: int) -> np.ndarray:
+        mask = np.zeros(n, dtype=bool)
+        for v in values:
+            rows = self._value_rows(v)
+            mask[rows[rows < n]] = True
+        return mask
+
+    def numeric(self, n: int) -> np.ndarray:
+        if len(self._numeric) >= n:
+            return self._numeric[:n]
+        out = np.full(n, np.nan, dtype=np.float64)
+        out[:len(self._numeric)] = self._numeric
+        return out
+
+def range_mask(col: np.ndarray, op: str, val: float) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        if op == "gt":
+            return col > val
+        if op == "gte":
+            return col >= val
+        if op == "lt":
+            return col < val
+        return col <= val
+
+# 네임스페이스의 필드별 인덱스 모음. 필드 인덱스는 처음 필터에 쓰일 때 한 번 만들고 이후 증분 갱신한다.
+class MetaFilterIndex:
+    def __init__(self):
+        self.fields: Dict[str, FieldIndex] = {}
+
+    def reset(self):
+        self.fields = {}
+
+    def ensure(self, field: str, metas: List[Dict[str, Any] | None], alive: np.ndarray) -> FieldIndex:
+        fi = self.fields.get(field)
+        if fi is None:
+            fi = FieldIndex(field)
+            for row in np.flatnonzero(alive).tolist():
+                fi.add(row, metas[row])
+            self.fields[field] = fi
+        return fi
+
+    def set(self, row: int, old: Dict[str, Any] | None, new: Dict[str, Any] | None):
+        for fi in self.fields.values():
+            fi.remove(row, old)
+            fi.add(row, new)
+
+    def mask(
+        self,
+        conds: List[Tuple[str, str, Any]],
+        metas: List[Dict[str, Any] | None],
+        alive: np.ndarray,
+        ts: np.ndarray
+    ) -> np.ndarray:
+        n = len(alive)
+        mask = alive.copy()
+        for field, op, val in conds:
+            if field == "ts":
+                if op == "in":
+                    mask &= np.isin(ts, [v for v in val if _is_number(v)])
+                else:
+                    mask &= range_mask(ts, op, val)
+                continue
+            fi = self.ensure(field, metas, alive)
+            if op == "in":
+                mask &= fi.in_mask(val, n)
+            else:
+                mask &= range_mask(fi.numeric(n), op, val)
+            if not mask.any():
+                break
+        return mask
+
+    def info(self) -> List[str]:
+        return sorted(self.fields)
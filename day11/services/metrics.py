@@ -0,0 +1,271 @@
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from bisect import bisect_left
+import contextvars
+import threading
+import time
+
+# 외부 의존성 없이 Prometheus 텍스트 형식으로 내보내는 최소한의 지표 모음
+# 관측은 (라벨 조회 + bisect) 정도라 요청 경로에서 매번 호출해도 부담이 없다.
+
+# 초 단위 지연 시간 버킷 (0.1ms ~ 60s). 캐시 조회 / 직렬화처럼 짧은 단계도 구분되도록 아래쪽을 촘촘히 둔다
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+    1.0, 2.5, 5.0, 7.5, 10.0, 30.0, 60.0
+)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUANTILES = (0.5, 0.9, 0.99)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels_text(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children: Dict[Labels, Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, n: float = 1.0):
+        self.value += n
+
+    def dec(self, n: float = 1.0):
+        self.value -= n
+
+    def set(self, v: float):
+        self.value = v
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, child in list(self._children.items()):
+            lines.append(f"{self.name}{_labels_text(self.label_names, key)} {_number(child.value)}")
+        return lines
+
+class Gauge(Counter):
+    kind = "gauge"
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # 마지막 칸은 +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        # 버킷 경계 사이를 선형 보간한 근사값 (Prometheus histogram_quantile 과 같은 방식)
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lo = self.buckets[i - 1] if i else 0.0
+                return lo + (self.buckets[i] - lo) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, child in list(self._children.items()):
+            acc = 0
+            for le, c in zip(self.buckets + (float("inf"),), child.counts):
+                acc += c
+                le_label = 'le="' + _number(le) + '"'
+                lines.append(f"{self.name}_bucket{_labels_text(self.label_names, key, le_label)} {acc}")
+            labels = _labels_text(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_number(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+    def summary(self, scale: float = 1000.0, digits: int = 2, sep: str = "/") -> Dict[str, Dict[str, Any]]:
+        # JSON /metrics 용: 라벨 값을 sep 으로 이은 키 -> count / avg / p50 / p90 / p99 (기본 ms)
+        out: Dict[str, Dict[str, Any]] = {}
+        for key, child in list(self._children.items()):
+            if not child.count:
+                continue
+            row: Dict[str, Any] = {
+                "count": child.count,
+                "avg": round(child.sum / child.count * scale, digits)
+            }
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}"] = round(child.quantile(q) * scale, digits)
+            out[sep.join(key)] = row
+        return out
+
+# 스크레이프 시점에 값을 읽어 오는 지표: (이름, 종류, 설명, [(라벨 dict, 값), ...]) 목록을 돌려준다
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+class Metrics:
+    def __init__(self):
+        # HTTP 엔드포인트 (라우트 경로 템플릿 단위)
+        self.http_requests = Counter(
+            "http_requests_total", "HTTP requests by endpoint and status", ("method", "endpoint", "status")
+        )
+        self.http_seconds = Histogram(
+            "http_request_duration_seconds", "HTTP request latency until the response body is sent", ("method", "endpoint")
+        )
+        self.http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+        self.http_exceptions = Counter(
+            "http_exceptions_total", "Unhandled exceptions by endpoint and type", ("endpoint", "type")
+        )
+        self.serialize_seconds = Histogram(
+            "http_serialize_seconds", "Time spent encoding JSON response bodies", ("endpoint",)
+        )
+        # 모델 추론 (InferService / MicroBatcher)
+        self.infer_seconds = Histogram(
+            "infer_request_duration_seconds", "InferService.infer / infer_with_detail latency", ("model",)
+        )
+        self.infer_in_flight = Gauge("infer_requests_in_flight", "Inference calls currently running", ("model",))
+        self.stage_seconds = Histogram(
+            "infer_stage_seconds", "Inference time by stage (cache_lookup, queue_wait, slot_wait, predict)", ("model", "stage")
+        )
+        self.cache_requests = Counter(
+            "infer_cache_requests_total", "Result cache lookups by outcome (hit, disk_hit, miss, coalesced)", ("model", "result")
+        )
+        self.batch_size = Histogram(
+            "infer_batch_size", "Number of inputs per predict call", ("model",), buckets=BATCH_SIZE_BUCKETS
+        )
+        self.infer_errors = Counter(
+            "infer_errors_total", "Failed inference items by exception type", ("model", "type")
+        )
+        self._families: List[_Family] = [
+            self.http_requests, self.http_seconds, self.http_in_flight, self.http_exceptions, self.serialize_seconds,
+            self.infer_seconds, self.infer_in_flight, self.stage_seconds, self.cache_requests, self.batch_size,
+            self.infer_errors
+        ]
+        self._collectors: List[Collector] = []
+
+    def add_collector(self, fn: Collector):
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self._families:
+            lines.extend(family.render())
+        for fn in self._collectors:
+            for name, kind, help, samples in fn():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{_labels_text(labels.keys(), labels.values())} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def latency(self) -> Dict[str, Any]:
+        return {
+            "endpoints": self.http_seconds.summary(sep=" "),
+            "models": self.infer_seconds.summary(),
+            "stages": self.stage_seconds.summary(),
+            "serialize": self.serialize_seconds.summary(),
+            "batch_size": self.batch_size.summary(scale=1.0)
+        }
+
+# ---------- HTTP ----------
+
+# 현재 처리 중인 요청의 ASGI scope (응답 직렬화 시간을 엔드포인트별로 기록하기 위해)
+current_scope: contextvars.ContextVar[dict | None] = contextvars.ContextVar("current_scope", default=None)
+
+def endpoint_label(scope: dict | None) -> str:
+    # 경로 그대로 쓰면 /v1/jobs/{id} 처럼 라벨이 무한히 늘어나므로 라우트 템플릿을 쓴다
+    route = (scope or {}).get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class HttpMetricsMiddleware:
+    # 순수 ASGI 미들웨어. 응답 본문 전송이 끝날 때까지의 시간과 상태 코드를 기록한다
+    # (스트리밍 응답도 마지막 조각까지 포함)
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        m = self.metrics
+        status = 500
+        t0 = time.perf_counter()
+        token = current_scope.set(scope)
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        m.http_in_flight.labels().inc()
+        try:
+            await self.app(scope, receive, _send)
+        except Exception as e:
+            m.http_exceptions.labels(endpoint_label(scope), type(e).__name__).inc()
+            raise
+        finally:
+            m.http_in_flight.labels().dec()
+            current_scope.reset(token)
+            endpoint = endpoint_label(scope)
+            m.http_requests.labels(scope["method"], endpoint, status).inc()
+            m.http_seconds.labels(scope["method"], endpoint).observe(time.perf_counter() - t0)
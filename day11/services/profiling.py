@@ -0,0 +1,230 @@
+from typing import Any, Dict, Iterator, List
+import contextlib
+import contextvars
+import sys
+import threading
+import time
+
+# 관리자용 프로파일링
+#   1) SamplingProfiler: N 초 동안 또는 다음 N 개 요청이 끝날 때까지 모든 스레드의 스택을 주기적으로 떠서
+#      flamegraph.pl / speedscope 가 읽는 collapsed stack ("a;b;c 12") 으로 돌려준다.
+#   2) StageTrace: X-Profile 헤더가 붙은 요청 하나의 단계별 시간 (Server-Timing 헤더로 응답)
+# 세션이 없으면 샘플링 스레드가 없고, X-Profile 요청이 아니면 current_trace 는 None 이라
+# 기록 지점은 None 확인만 하고 지나간다.
+
+# ---------- 요청 단위 단계별 시간 ----------
+
+class StageTrace:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        # stage -> [횟수, 합계(초), 최대(초)]
+        self.stages: Dict[str, List[float]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float):
+        s = self.stages.get(stage)
+        if s is None:
+            self.stages[stage] = [1, seconds, seconds]
+        else:
+            s[0] += 1
+            s[1] += seconds
+            s[2] = max(s[2], seconds)
+
+    def count(self, name: str, n: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "stages": {
+                stage: {"n": int(n), "sum_ms": round(total * 1000, 2), "max_ms": round(longest * 1000, 2)}
+                for stage, (n, total, longest) in self.stages.items()
+            },
+            "counts": dict(self.counts),
+            "total_ms": round((time.perf_counter() - self.t0) * 1000, 2)
+        }
+
+    def server_timing(self) -> str:
+        # 입력마다 병렬로 도는 단계(queue_wait, predict 등)는 합계가 벽시계 시간보다 커지므로
+        # dur 은 가장 긴 한 건, desc 에 횟수와 합계를 적는다
+        parts = []
+        for stage, (n, total, longest) in self.stages.items():
+            parts.append(f'{stage};dur={longest * 1000:.2f};desc="n={int(n)} sum={total * 1000:.2f}ms"')
+        for name, n in self.counts.items():
+            parts.append(f'{name};desc="{n}"')
+        parts.append(f"total;dur={(time.perf_counter() - self.t0) * 1000:.2f}")
+        return ", ".join(parts)
+
+current_trace: contextvars.ContextVar[StageTrace | None] = contextvars.ContextVar("current_trace", default=None)
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - t0)
+
+# ---------- 샘플링 프로파일러 ----------
+
+class ProfilerBusy(Exception):
+    pass
+
+class SamplingProfiler:
+    def __init__(self, max_seconds: float = 300.0):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._labels: Dict[Any, str] = {}
+        # 요청 수 기준 세션일 때만 값이 있다 (미들웨어가 이 값이 있을 때만 센다)
+        self.requests_left: int | None = None
+        self.session: Dict[str, Any] | None = None
+        self.stacks: Dict[str, int] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float | None = None, requests: int | None = None, interval_ms: float = 5.0) -> Dict[str, Any]:
+        # seconds / requests 중 먼저 도달하는 쪽에서 멈춘다. 둘 다 없으면 max_seconds
+        with self._lock:
+            if self.running:
+                raise ProfilerBusy("이미 프로파일링 중입니다")
+            limit = min(seconds or self.max_seconds, self.max_seconds)
+            self._stop.clear()
+            self.stacks = {}
+            self.requests_left = requests if requests else None
+            self.session = {
+                "started_at": time.time(),
+                "seconds": limit,
+                "requests": requests,
+                "interval_ms": interval_ms,
+                "samples": 0,
+                "finished_at": None
+            }
+            self._thread = threading.Thread(
+                target=self._run, args=(limit, max(0.5, interval_ms) / 1000), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+            return self.status()
+
+    def request_done(self):
+        left = self.requests_left
+        if left is None:
+            return
+        left -= 1
+        self.requests_left = left
+        if left <= 0:
+            self._stop.set()
+
+    def join(self, timeout_s: float | None = None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout_s)
+
+    def stop(self, timeout_s: float = 5.0) -> Dict[str, Any]:
+        self._stop.set()
+        self.join(timeout_s)
+        return self.status()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            # 패키지 경로는 잘라내고 "디렉터리/파일.py:함수" 로 줄인다 (collapsed 형식이라 ; 와 공백은 뺀다)
+            parts = code.co_filename.replace("\\", "/").split("/")
+            where = "/".join(parts[-2:])
+            label = f"{where}:{code.co_name}".replace(";", ":").replace(" ", "_")
+            self._labels[code] = label
+        return label
+
+    def _run(self, limit_s: float, interval_s: float):
+        me = threading.get_ident()
+        deadline = time.monotonic() + limit_s
+        stacks = self.stacks
+        samples = 0
+        try:
+            while not self._stop.is_set() and time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    frames = []
+                    while frame is not None:
+                        frames.append(self._label(frame.f_code))
+                        frame = frame.f_back
+                    frames.append(names.get(ident, str(ident)).replace(" ", "_").replace(";", ":"))
+                    key = ";".join(reversed(frames))
+                    stacks[key] = stacks.get(key, 0) + 1
+                samples += 1
+                self.session["samples"] = samples
+                self._stop.wait(interval_s)
+        finally:
+            self.requests_left = None
+            self.session["finished_at"] = time.time()
+
+    def status(self) -> Dict[str, Any]:
+        if self.session is None:
+            return {"running": False, "session": None}
+        return {
+            "running": self.running,
+            "requests_left": self.requests_left,
+            "session": dict(self.session),
+            "distinct_stacks": len(self.stacks)
+        }
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in sorted(self.stacks.items(), key=lambda kv: -kv[1]))
+
+# ---------- HTTP ----------
+
+class ProfilingMiddleware:
+    # 관리자 키가 있는 X-Profile 요청에만 StageTrace 를 붙이고 Server-Timing 헤더로 돌려준다.
+    # 요청 수 기준 프로파일링 세션 중에는 끝난 요청 수를 센다 (/admin 요청 제외)
+    def __init__(self, app, profiler: SamplingProfiler, admin_keys: set[str]):
+        self.app = app
+        self.profiler = profiler
+        self.admin_keys = {k.encode("latin-1") for k in admin_keys}
+
+    def _wants_trace(self, scope) -> bool:
+        flag = key = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                flag = value
+            elif name == b"x-api-key":
+                key = value
+        return flag is not None and flag not in (b"0", b"false") and key in self.admin_keys
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counting = self.profiler.requests_left is not None and not scope["path"].startswith("/admin")
+        if not self._wants_trace(scope):
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if counting:
+                    self.profiler.request_done()
+            return
+
+        trace = StageTrace()
+        token = current_trace.set(trace)
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            current_trace.reset(token)
+            if counting:
+                self.profiler.request_done()
@@ -0,0 +1,214 @@
+from typing import Any, AsyncIterator, Iterator, List
+import codecs
+import csv
+import json
+
+# 업로드 파일을 통째로 읽지 않고 read_size 바이트씩 읽어 chunk_rows 개 단위로 입력을 내보낸다.
+# 메모리 사용량은 (읽기 버퍼 + 청크 하나) 로 제한된다.
+
+FILE_TYPES = {
+    ".csv": "csv",
+    ".json": "json",
+    ".jsonl": "ndjson",
+    ".ndjson": "ndjson"
+}
+
+def file_type(filename: str | None) -> str | None:
+    name = (filename or "").lower()
+    for ext, ftype in FILE_TYPES.items():
+        if name.endswith(ext):
+            return ftype
+    return None
+
+def _clean(value: Any) -> str | None:
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+async def _iter_text(file, read_size: int) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        raw = await file.read(read_size)
+        if not raw:
+            break
+        text = decoder.decode(raw)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+# ---------- CSV ----------
+
+class _CsvRecords:
+    # 줄 단위로 잘라도 따옴표 안의 줄바꿈은 한 레코드로 묶어서 csv 모듈에 넘긴다
+    def __init__(self):
+        self._buf = ""
+        self._record = ""
+
+    def feed(self, text: str, final: bool = False) -> Iterator[List[str]]:
+        self._buf += text
+        lines = self._buf.split("\n")
+        self._buf = "" if final else lines.pop()
+        for line in lines:
+            self._record += line + "\n"
+            if self._record.count('"') % 2 == 0:
+                record, self._record = self._record, ""
+                yield from csv.reader([record])
+        if final and self._record:
+            record, self._record = self._record, ""
+            yield from csv.reader([record])
+
+# ---------- JSON ----------
+
+class _JsonArrayItems:
+    # {"inputs": [...]} 또는 최상위 배열의 원소를 도착하는 대로 하나씩 디코딩한다
+    def __init__(self):
+        self._dec = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+
+    def _skip_ws(self):
+        while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+            self._pos += 1
+
+    def _peek(self) -> str | None:
+        self._skip_ws()
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _decode(self) -> tuple[bool, Any]:
+        self._skip_ws()
+        try:
+            value, end = self._dec.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            return False, None
+        if end == len(self._buf) and not isinstance(value, (str, list, dict)):
+            # 숫자/리터럴은 뒤에 더 올 수 있으므로 다음 조각까지 기다린다
+            return False, None
+        self._pos = end
+        return True, value
+
+    def feed(self, text: str, final: bool = False) -> Iterator[Any]:
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        while True:
+            ch = self._peek()
+            if ch is None:
+                break
+            if self._state == "start":
+                if ch == "[":
+                    self._pos += 1
+                    self._state = "item"
+                elif ch == "{":
+                    self._pos += 1
+                    self._state = "key"
+                else:
+                    raise ValueError("지원하지 않는 json 구조")
+            elif self._state == "key":
+                if ch == "}":
+                    raise ValueError("지원하지 않는 json 구조")
+                if ch == ",":
+                    self._pos += 1
+                    continue
+                ok, key = self._decode()
+                if not ok:
+                    break
+                self._state = "inputs_colon" if key == "inputs" else "skip_colon"
+            elif self._state in ("inputs_colon", "skip_colon"):
+                if ch != ":":
+                    raise ValueError("잘못된 json")
+                self._pos += 1
+                self._state = "inputs" if self._state == "inputs_colon" else "skip"
+            elif self._state == "skip":
+                ok, _ = self._decode()
+                if not ok:
+                    break
+                self._state = "key"
+            elif self._state == "inputs":
+                if ch != "[":
+                    raise ValueError("inputs 는 배열이어야 합니다.")
+                self._pos += 1
+                self._state = "item"
+            elif self._state == "item":
+                if ch == "]":
+                    self._pos += 1
+                    self._state = "done"
+                elif ch == ",":
+                    self._pos += 1
+                else:
+                    ok, value = self._decode()
+                    if not ok:
+                        break
+                    yield value
+            else:
+                # 배열이 끝난 뒤의 나머지(닫는 괄호 등)는 무시
+                self._pos = len(self._buf)
+        if final and self._state == "start":
+            raise ValueError("빈 파일")
+        if final and self._state != "done":
+            raise ValueError("잘못된 json: 입력 배열이 끝나지 않았습니다.")
+
+# ---------- NDJSON ----------
+
+class _NdjsonItems:
+    # 한 줄에 문자열 하나 또는 {"text": ...} 객체 하나
+    def __init__(self):
+        self._buf = ""
+
+    def feed(self, text: str, final: bool = False) -> Iterator[Any]:
+        self._buf += text
+        lines = self._buf.split("\n")
+        self._buf = "" if final else lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                raise ValueError(f"잘못된 json 줄: {line[:50]}")
+            yield item.get("text") if isinstance(item, dict) else item
+
+async def iter_upload(
+    file,
+    ftype: str,
+    chunk_rows: int = 256,
+    read_size: int = 64 * 1024,
+    first_rows: int | None = None
+) -> AsyncIterator[List[str]]:
+    if ftype == "csv":
+        parser = _CsvRecords()
+        pick = lambda row: _clean(row[0]) if row else None
+    elif ftype == "json":
+        parser = _JsonArrayItems()
+        pick = _clean
+    elif ftype == "ndjson":
+        parser = _NdjsonItems()
+        pick = _clean
+    else:
+        raise ValueError("지원하지 않는 형식")
+
+    # 첫 응답이 빨리 나가도록 청크 크기를 first_rows 부터 두 배씩 chunk_rows 까지 키운다
+    limit = min(first_rows or chunk_rows, chunk_rows)
+    chunk: List[str] = []
+    try:
+        async for text in _iter_text(file, read_size):
+            for item in parser.feed(text):
+                value = pick(item)
+                if value is not None:
+                    chunk.append(value)
+                    if len(chunk) >= limit:
+                        yield chunk
+                        chunk = []
+                        limit = min(limit * 2, chunk_rows)
+        for item in parser.feed("", final=True):
+            value = pick(item)
+            if value is not None:
+                chunk.append(value)
+    except ValueError:
+        # 파싱 오류 전까지 읽은 입력은 먼저 내보낸다
+        if chunk:
+            yield chunk
+        raise
+    if chunk:
+        yield chunk
@@ -0,0 +1,48 @@
+from typing import Any, Dict, List
+import base64
+import numpy as np
+
+FORMATS = ("float", "base64", "float16", "int8")
+
+def truncate(vecs: np.ndarray, dimensions: int | None) -> np.ndarray:
+    # 앞쪽 차원만 남기고 다시 정규화해서 내적 = 코사인 관계를 유지
+    if not dimensions or dimensions >= vecs.shape[1]:
+        return vecs
+    if dimensions < 1:
+        raise ValueError("dimensions 는 1 이상이어야 합니다.")
+    out = np.ascontiguousarray(vecs[:, :dimensions], dtype=np.float32)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return out / norms
+
+def quantize_int8(vecs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # 벡터별 scale: v ≈ q * scale
+    scale = np.abs(vecs).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(vecs / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+def _b64(arr: np.ndarray) -> str:
+    return base64.b64encode(arr.tobytes()).decode("ascii")
+
+def encode(vecs: np.ndarray, fmt: str = "float") -> List[Any]:
+    if fmt == "float":
+        return vecs.tolist()
+    if fmt == "base64":
+        le = vecs.astype("<f4", copy=False)
+        return [_b64(v) for v in le]
+    if fmt == "float16":
+        le = vecs.astype("<f2")
+        return [_b64(v) for v in le]
+    if fmt == "int8":
+        q, scale = quantize_int8(vecs)
+        return [{"data": _b64(v), "scale": float(s)} for v, s in zip(q, scale)]
+    raise ValueError(f"지원하지 않는 format: {fmt} (가능: {', '.join(FORMATS)})")
+
+def describe(fmt: str) -> Dict[str, str]:
+    return {
+        "float": {"dtype": "float32", "encoding": "json"},
+        "base64": {"dtype": "<f4", "encoding": "base64"},
+        "float16": {"dtype": "<f2", "encoding": "base64"},
+        "int8": {"dtype": "int8", "encoding": "base64", "dequantize": "value * scale"}
+    }[fmt]
@@ -0,0 +1,102 @@
+from typing import List
+import os
+import tempfile
+import numpy as np
+
+from .vec_codec import quantize_int8
+
+DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8
+}
+
+# 네임스페이스 벡터 저장 컬럼. float32 / float16 / int8(행별 scale) 중 하나로 보관하고
+# 채점은 블록 단위로 float32 로 풀어서 계산해 임시 메모리를 block x dim 으로 제한한다.
+class VectorColumn:
+    def __init__(self, dtype: str = "float32", dim: int = 0, capacity: int = 0, spill_dir: str | None = None):
+        if dtype not in DTYPES:
+            raise ValueError(f"지원하지 않는 dtype: {dtype} (가능: {', '.join(DTYPES)})")
+        self.dtype = dtype
+        self.dim = dim
+        # spill_dir 가 있으면 RAM 대신 디스크 memmap 에 보관 (재채점용 float32 원본 등)
+        self.spill_dir = spill_dir
+        self.codes = self._alloc(capacity)
+        self.scale = np.ones(capacity, dtype=np.float32) if dtype == "int8" else None
+
+    @classmethod
+    def wrap(cls, codes: np.ndarray, dtype: str, scale: np.ndarray | None = None, spill_dir: str | None = None) -> "VectorColumn":
+        col = cls(dtype, codes.shape[1] if codes.ndim == 2 else 0, 0, spill_dir)
+        col.codes = codes
+        if dtype == "int8":
+            col.scale = scale if scale is not None else np.ones(len(codes), dtype=np.float32)
+        return col
+
+    def _alloc(self, cap: int) -> np.ndarray:
+        np_dtype = DTYPES[self.dtype]
+        if self.spill_dir and cap and self.dim:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, path = tempfile.mkstemp(dir=self.spill_dir, suffix=".vec")
+            os.close(fd)
+            arr = np.memmap(path, dtype=np_dtype, mode="w+", shape=(cap, self.dim))
+            try:
+                # 매핑이 살아있는 동안은 파일이 유지되고, 프로세스 종료 시 자동으로 정리된다
+                os.unlink(path)
+            except OSError:
+                pass
+            return arr
+        return np.zeros((cap, self.dim), dtype=np_dtype)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + (self.scale.nbytes if self.scale is not None else 0))
+
+    def grow(self, new_cap: int, size: int):
+        codes = self._alloc(new_cap)
+        codes[:size] = self.codes[:size]
+        self.codes = codes
+        if self.scale is not None:
+            scale = np.ones(new_cap, dtype=np.float32)
+            scale[:size] = self.scale[:size]
+            self.scale = scale
+
+    def set(self, rows: List[int] | np.ndarray, vecs: np.ndarray):
+        vecs = np.asarray(vecs, dtype=np.float32)
+        if self.dtype == "int8":
+            q, s = quantize_int8(vecs)
+            self.codes[rows] = q
+            self.scale[rows] = s
+        else:
+            self.codes[rows] = vecs
+
+    def get(self, rows: List[int] | np.ndarray) -> np.ndarray:
+        out = np.asarray(self.codes[rows], dtype=np.float32)
+        if self.scale is not None:
+            out = out * self.scale[rows][:, None]
+        return out
+
+    def take(self, keep: np.ndarray, capacity: int) -> "VectorColumn":
+        col = VectorColumn(self.dtype, self.dim, capacity, self.spill_dir)
+        n = len(keep)
+        col.codes[:n] = self.codes[keep]
+        if self.scale is not None:
+            col.scale[:n] = self.scale[keep]
+        return col
+
+    def scores(self, qvs: np.ndarray, rows: np.ndarray | None = None, n: int = 0, block: int = 65536) -> np.ndarray:
+        total = len(rows) if rows is not None else n
+        out = np.empty((len(qvs), total), dtype=np.float32)
+        for s in range(0, total, block):
+            e = min(s + block, total)
+            idx = rows[s:e] if rows is not None else slice(s, e)
+            blk = self.codes[idx]
+            if blk.dtype != np.float32:
+                blk = blk.astype(np.float32)
+            out[:, s:e] = qvs @ blk.T
+            if self.scale is not None:
+                out[:, s:e] *= self.scale[idx]
+        return out
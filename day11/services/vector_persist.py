@@ -0,0 +1,217 @@
+from typing import Any, Dict, Iterator, List, Tuple
+from urllib.parse import quote, unquote
+import json
+import os
+import shutil
+import numpy as np
+
+# 양자화 네임스페이스의 코드 파일 (dtype -> (파일명, 디스크 dtype))
+_CODE_FILES = {
+    "float16": ("codes.f16", "<f2"),
+    "int8": ("codes.i8", "i1")
+}
+
+def _fsync_path(path: str):
+    # 파일은 내용, 디렉터리는 그 안의 생성 / 이름 변경 기록을 디스크에 내린다
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+# 네임스페이스 디스크 레이아웃
+#   {root}/{quoted name}/CURRENT             현재 스냅샷 세대 번호
+#   {root}/{quoted name}/snap-{gen}/         meta.json, vecs.f32 (또는 codes.f16 / codes.i8 + scale.f32), ts.f64, docs.jsonl
+#   {root}/{quoted name}/wal-{gen}.log       스냅샷 이후 변경 기록 (JSON 한 줄씩)
+#   {root}/{quoted name}/wal-{gen}.f32       WAL 레코드가 가리키는 원시 float32 벡터
+# 복구 = CURRENT 스냅샷 로드 + 그 세대 이상의 WAL 을 순서대로 재생
+class NamespaceStorage:
+    def __init__(self, root: str, name: str, fsync: bool = False):
+        self.name = name
+        self.dir = os.path.join(root, quote(name, safe=""))
+        self.fsync = fsync
+        os.makedirs(self.dir, exist_ok=True)
+
+        self.gen = self._read_current()
+        self.wal_gen = max([self.gen, *self._wal_gens()])
+        self.wal_rows = 0
+        self._log = None
+        self._vec = None
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.dir, *parts)
+
+    def _read_current(self) -> int:
+        try:
+            with open(self._path("CURRENT"), encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _wal_gens(self) -> List[int]:
+        gens = []
+        for fn in os.listdir(self.dir):
+            if fn.startswith("wal-") and fn.endswith(".log"):
+                try:
+                    gens.append(int(fn[4:-4]))
+                except ValueError:
+                    pass
+        return sorted(gens)
+
+    # ---------- WAL ----------
+
+    def _open_wal(self):
+        if self._log is None:
+            self._log = open(self._path(f"wal-{self.wal_gen}.log"), "a", encoding="utf-8")
+            self._vec = open(self._path(f"wal-{self.wal_gen}.f32"), "ab")
+
+    def append(self, record: Dict[str, Any], vecs: np.ndarray | None = None):
+        self._open_wal()
+        if vecs is not None:
+            record["voff"] = self._vec.tell()
+            record["dim"] = int(vecs.shape[1])
+            self._vec.write(np.ascontiguousarray(vecs, dtype="<f4").tobytes())
+            self._vec.flush()
+        self._log.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._vec.fileno())
+            os.fsync(self._log.fileno())
+        self.wal_rows += len(record.get("ids") or ())
+
+    def rotate(self) -> int:
+        # 새 WAL 세대로 전환하고, 그 세대 번호를 다음 스냅샷 번호로 돌려준다
+        self.close()
+        self.wal_gen += 1
+        self.wal_rows = 0
+        self._open_wal()
+        return self.wal_gen
+
+    def close(self):
+        for f in (self._log, self._vec):
+            if f is not None:
+                f.close()
+        self._log = None
+        self._vec = None
+
+    def replay(self) -> Iterator[Tuple[Dict[str, Any], np.ndarray | None]]:
+        for gen in self._wal_gens():
+            if gen < self.gen:
+                continue
+            vec_path = self._path(f"wal-{gen}.f32")
+            raw = np.memmap(vec_path, dtype="<f4", mode="r") if os.path.getsize(vec_path) else None
+            with open(self._path(f"wal-{gen}.log"), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 기록 도중 종료된 마지막 줄
+                        break
+                    vecs = None
+                    if "voff" in rec and raw is not None:
+                        start = rec["voff"] // 4
+                        n = len(rec["ids"]) * rec["dim"]
+                        if start + n > len(raw):
+                            break
+                        vecs = np.asarray(raw[start:start + n]).reshape(-1, rec["dim"])
+                    yield rec, vecs
+                    self.wal_rows += len(rec.get("ids") or ())
+
+    # ---------- 스냅샷 ----------
+
+    def write_snapshot(self, gen: int, state: Dict[str, Any]):
+        final = self._path(f"snap-{gen}")
+        tmp = final + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        vecs: np.ndarray | None = state.pop("vecs", None)
+        codes: np.ndarray | None = state.pop("codes", None)
+        scale: np.ndarray | None = state.pop("scale", None)
+        ts: np.ndarray = state.pop("ts")
+        ids, texts, metas = state.pop("ids"), state.pop("texts"), state.pop("metas")
+
+        if vecs is not None:
+            np.ascontiguousarray(vecs, dtype="<f4").tofile(os.path.join(tmp, "vecs.f32"))
+        if codes is not None:
+            fn, disk_dtype = _CODE_FILES[state["dtype"]]
+            np.ascontiguousarray(codes, dtype=disk_dtype).tofile(os.path.join(tmp, fn))
+        if scale is not None:
+            np.ascontiguousarray(scale, dtype="<f4").tofile(os.path.join(tmp, "scale.f32"))
+        np.ascontiguousarray(ts, dtype="<f8").tofile(os.path.join(tmp, "ts.f64"))
+        with open(os.path.join(tmp, "docs.jsonl"), "w", encoding="utf-8") as f:
+            for eid, text, meta in zip(ids, texts, metas):
+                f.write(json.dumps([eid, text, meta], ensure_ascii=False) + "\n")
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({**state, "name": self.name, "size": len(ids)}, f, ensure_ascii=False)
+
+        if self.fsync:
+            # CURRENT 를 바꾸고 이전 WAL 을 지우기 전에 스냅샷이 디스크에 있어야 한다
+            for fn in os.listdir(tmp):
+                _fsync_path(os.path.join(tmp, fn))
+            _fsync_path(tmp)
+
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+
+        cur_tmp = self._path("CURRENT.tmp")
+        with open(cur_tmp, "w", encoding="utf-8") as f:
+            f.write(str(gen))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if self.fsync:
+            _fsync_path(self.dir)
+        os.replace(cur_tmp, self._path("CURRENT"))
+        if self.fsync:
+            _fsync_path(self.dir)
+
+        old = self.gen
+        self.gen = gen
+        for g in range(old, gen):
+            shutil.rmtree(self._path(f"snap-{g}"), ignore_errors=True)
+            for ext in ("log", "f32"):
+                try:
+                    os.remove(self._path(f"wal-{g}.{ext}"))
+                except FileNotFoundError:
+                    pass
+
+    def load_snapshot(self) -> Dict[str, Any] | None:
+        snap = self._path(f"snap-{self.gen}")
+        if not os.path.exists(os.path.join(snap, "meta.json")):
+            return None
+        with open(os.path.join(snap, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        size, dim = meta["size"], meta["dim"]
+        # 벡터는 파싱하지 않고 메모리 맵 (copy-on-write 라 이후 수정은 프로세스 메모리에만 반영)
+        if size and dim:
+            path = os.path.join(snap, "vecs.f32")
+            if os.path.exists(path):
+                meta["vecs"] = np.memmap(path, dtype="<f4", mode="c", shape=(size, dim))
+            code_file = _CODE_FILES.get(meta.get("dtype"))
+            if code_file is not None and os.path.exists(os.path.join(snap, code_file[0])):
+                meta["codes"] = np.memmap(os.path.join(snap, code_file[0]), dtype=code_file[1], mode="c", shape=(size, dim))
+            path = os.path.join(snap, "scale.f32")
+            if os.path.exists(path):
+                meta["scale"] = np.fromfile(path, dtype="<f4")
+            ts = np.fromfile(os.path.join(snap, "ts.f64"), dtype="<f8")
+        else:
+            meta["vecs"] = np.zeros((0, dim or 0), dtype=np.float32)
+            ts = np.zeros(0, dtype=np.float64)
+
+        ids, texts, metas = [], [], []
+        with open(os.path.join(snap, "docs.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                eid, text, m = json.loads(line)
+                ids.append(eid)
+                texts.append(text)
+                metas.append(m)
+
+        meta.update(ts=ts, ids=ids, texts=texts, metas=metas)
+        return meta
+
+def list_persisted(root: str) -> List[str]:
+    if not os.path.isdir(root):
+        return []
+    return [unquote(d) for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))]
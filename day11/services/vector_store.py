@@ -0,0 +1,635 @@
+from typing import Any, Dict, List, Tuple
+import tempfile
+import threading
+import numpy as np
+
+from .ann_index import build_index
+from .vector_persist import NamespaceStorage, list_persisted
+from .meta_filter import MetaFilterIndex, parse_filter
+from .vec_column import DTYPES, VectorColumn
+
+# id 는 JSON 스칼라만 받는다. list / dict 는 해시할 수 없어 WAL 에 남으면 재생할 때마다 실패한다
+_ID_TYPES = (str, int, float, bool, type(None))
+
+def check_ids(ids: List[Any]):
+    for eid in ids:
+        if not isinstance(eid, _ID_TYPES):
+            raise ValueError(f"id 는 문자열 또는 숫자여야 합니다: {eid!r}")
+
+# 네임스페이스 하나 = 연속된 벡터 컬럼(float32/float16/int8) + id→row 인덱스 + 메타데이터 컬럼
+# 삭제는 툼스톤(_alive=False)으로 처리하고 빈 슬롯은 다음 삽입에 재사용한다.
+# 양자화 + rescore 네임스페이스는 재채점용 float32 원본을 디스크로 내린 memmap 에 따로 둔다.
+class VectorNamespace:
+    def __init__(
+        self,
+        name: str,
+        dim: int | None = None,
+        capacity: int = 1024,
+        index: str | None = None,
+        index_params: dict | None = None,
+        dtype: str | None = None,
+        rescore: bool = False,
+        spill_dir: str | None = None
+    ):
+        self.name = name
+        self.dim = dim
+        self.size = 0
+        self.dtype = dtype or "float32"
+        if self.dtype not in DTYPES:
+            raise ValueError(f"지원하지 않는 dtype: {self.dtype} (가능: {', '.join(DTYPES)})")
+        self.rescore = bool(rescore) and self.dtype != "float32"
+        self.spill_dir = spill_dir
+        self._col: VectorColumn | None = None
+        self._exact: VectorColumn | None = None
+        if dim:
+            self._init_columns(dim, capacity)
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._free: List[int] = []
+        self._layout = 0
+        self._compacting = False
+        self.compact_ratio = 0.25
+        self.filter_exact_max = 50000
+        self.ids: List[Any] = []
+        self.texts: List[str] = []
+        self.metas: List[Dict[str, Any]] = []
+        self.id2row: Dict[Any, int] = {}
+        self.filters = MetaFilterIndex()
+        self.lock = threading.RLock()
+
+        self.index_kind = (index or "flat").lower()
+        self.index_params = dict(index_params or {})
+        self.index = build_index(self.index_kind, self.index_params)
+        self._rebuilding = False
+        self._dirty: set[int] | None = None
+
+        self.storage: NamespaceStorage | None = None
+        self.snapshot_every = 0
+        self._snapshotting = False
+
+    @property
+    def count(self) -> int:
+        return self.size - len(self._free)
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self._ts[:self.size]
+
+    def _init_columns(self, dim: int, capacity: int):
+        self.dim = dim
+        self._col = VectorColumn(self.dtype, dim, capacity)
+        if self.rescore:
+            self._exact = VectorColumn("float32", dim, capacity, spill_dir=self.spill_dir or tempfile.gettempdir())
+
+    def _decode(self, rows) -> np.ndarray:
+        # 인덱스 학습/할당에는 원본이 있으면 원본을, 없으면 양자화 값을 풀어서 사용
+        return (self._exact or self._col).get(rows)
+
+    def _reserve(self, n: int):
+        cap = len(self._ts)
+        if n <= cap:
+            return
+        new_cap = max(n, cap * 2)
+        for col in (self._col, self._exact):
+            if col is not None:
+                col.grow(new_cap, self.size)
+        ts = np.zeros(new_cap, dtype=np.float64)
+        ts[:self.size] = self._ts[:self.size]
+        alive = np.zeros(new_cap, dtype=bool)
+        alive[:self.size] = self._alive[:self.size]
+        self._ts, self._alive = ts, alive
+
+    def upsert(self, ids: List[Any], texts: List[str], vecs: np.ndarray, metas: List[Dict[str, Any]], now: float) -> Tuple[int, int]:
+        vecs = np.asarray(vecs, dtype=np.float32)
+        with self.lock:
+            if self.dim is None and vecs.ndim == 2:
+                self._init_columns(vecs.shape[1], len(self._ts))
+            if vecs.ndim != 2 or vecs.shape[1] != self.dim:
+                raise ValueError(f"벡터 차원 불일치: {vecs.shape[-1]} != {self.dim}")
+            # WAL 에 쓰기 전에 검사한다
+            check_ids(ids)
+            if not all(isinstance(meta, dict) for meta in metas):
+                raise ValueError("metadata 는 dict 여야 합니다.")
+
+            if self.storage is not None:
+                self.storage.append({"op": "upsert", "ids": list(ids), "texts": list(texts), "metas": list(metas), "ts": now}, vecs)
+
+            added = 0
+            updated = 0
+            touched: List[int] = []
+            self._reserve(self.size + len(ids))
+            for eid, text, meta in zip(ids, texts, metas):
+                row = self.id2row.get(eid)
+                if row is None:
+                    if self._free:
+                        row = self._free.pop()
+                        self.ids[row] = eid
+                        self.texts[row] = text
+                        self.metas[row] = meta
+                        self.filters.set(row, None, meta)
+                    else:
+                        row = self.size
+                        self.size += 1
+                        self.ids.append(eid)
+                        self.texts.append(text)
+                        self.metas.append(meta)
+                        self.filters.set(row, None, meta)
+                    self._alive[row] = True
+                    self.id2row[eid] = row
+                    added += 1
+                else:
+                    self.filters.set(row, self.metas[row], meta)
+                    self.texts[row] = text
+                    self.metas[row] = meta
+                    updated += 1
+                self._ts[row] = now
+                touched.append(row)
+
+            self._col.set(touched, vecs)
+            if self._exact is not None:
+                self._exact.set(touched, vecs)
+            self._index_rows(touched)
+            self._maybe_snapshot()
+        return added, updated
+
+    def delete(self, ids: List[Any]) -> int:
+        check_ids(ids)
+        with self.lock:
+            rows = [(eid, self.id2row[eid]) for eid in dict.fromkeys(ids) if eid in self.id2row]
+            if not rows:
+                return 0
+            if self.storage is not None:
+                self.storage.append({"op": "delete", "ids": [eid for eid, _ in rows]})
+
+            for eid, row in rows:
+                del self.id2row[eid]
+                self.filters.set(row, self.metas[row], None)
+                self._alive[row] = False
+                self.ids[row] = None
+                self.texts[row] = None
+                self.metas[row] = None
+                self._free.append(row)
+
+            dead = [row for _, row in rows]
+            if self.index is not None:
+                self.index.remove(dead)
+                if self._dirty is not None:
+                    self._dirty.update(dead)
+            self._maybe_compact()
+            self._maybe_snapshot()
+            return len(rows)
+
+    def update_metadata(self, ids: List[Any], metas: List[Dict[str, Any]], replace: bool = False) -> Tuple[int, List[Any]]:
+        check_ids(ids)
+        with self.lock:
+            found: List[Tuple[int, Dict[str, Any]]] = []
+            missing: List[Any] = []
+            for eid, meta in zip(ids, metas):
+                row = self.id2row.get(eid)
+                if row is None:
+                    missing.append(eid)
+                    continue
+                # 기존 dict 를 수정하지 않고 새로 만들어 스냅샷 중인 상태와 섞이지 않게 한다
+                new_meta = dict(meta or {}) if replace else {**(self.metas[row] or {}), **(meta or {})}
+                found.append((row, new_meta))
+
+            if found and self.storage is not None:
+                self.storage.append({
+                    "op": "meta",
+                    "ids": [self.ids[row] for row, _ in found],
+                    "metas": [m for _, m in found]
+                })
+            for row, new_meta in found:
+                self.filters.set(row, self.metas[row], new_meta)
+                self.metas[row] = new_meta
+            return len(found), missing
+
+    def _index_rows(self, rows: List[int]):
+        if self.index is None or not rows:
+            return
+        if self._dirty is not None:
+            self._dirty.update(rows)
+        if self.index.is_trained:
+            self.index.add(rows, self._decode(rows))
+        if self._needs_rebuild():
+            self.rebuild_index(background=True)
+
+    def _needs_rebuild(self) -> bool:
+        if self.index is None or self._rebuilding:
+            return False
+        if not self.index.is_trained:
+            return self.count >= self.index.min_train_size
+        # 학습 이후 데이터가 두 배로 늘면 중심을 다시 학습
+        return self.count >= 2 * max(1, self.index.trained_size)
+
+    def rebuild_index(self, background: bool = False) -> bool:
+        if self.index is None:
+            return False
+        with self.lock:
+            if self._rebuilding:
+                return False
+            self._rebuilding = True
+        if background:
+            threading.Thread(target=self._rebuild, name=f"ivf-rebuild-{self.name}", daemon=True).start()
+        else:
+            self._rebuild()
+        return True
+
+    def _rebuild(self):
+        try:
+            with self.lock:
+                layout = self._layout
+                n = self.size
+                rows = np.flatnonzero(self._alive[:n])
+                snap = self._decode(rows)
+                self._dirty = set()
+            if len(rows) == 0:
+                return
+            # 학습/할당은 락 밖에서 하고, 그동안 바뀐 행만 교체 후에 다시 반영
+            centroids = self.index.train(snap)
+            assign = self.index.assign(snap, centroids)
+            with self.lock:
+                if layout != self._layout:
+                    # 재학습 도중 compaction 으로 행 번호가 바뀌었으면 현재 배치로 다시 할당
+                    n = self.size
+                    rows = np.flatnonzero(self._alive[:n])
+                    assign = self.index.assign(self._decode(rows), centroids)
+                    self._dirty = set()
+                self.index.reset(centroids, rows, assign)
+                extra = sorted(self._dirty | set(range(n, self.size)))
+                alive = [r for r in extra if self._alive[r]]
+                self.index.remove([r for r in extra if not self._alive[r]])
+                if alive:
+                    self.index.add(alive, self._decode(alive))
+        finally:
+            with self.lock:
+                self._dirty = None
+                self._rebuilding = False
+                # 재학습 도중 데이터가 크게 늘었으면 한 번 더
+                again = self._needs_rebuild()
+            if again:
+                self.rebuild_index(background=True)
+
+    def _maybe_compact(self):
+        if self._compacting or len(self._free) < max(1024, self.compact_ratio * self.size):
+            return
+        self._compacting = True
+        threading.Thread(target=self.compact, name=f"vec-compact-{self.name}", daemon=True).start()
+
+    def compact(self) -> int:
+        # 툼스톤을 걷어내고 살아있는 행만 앞으로 모은다
+        try:
+            with self.lock:
+                if not self._free:
+                    return 0
+                keep = np.flatnonzero(self._alive[:self.size])
+                n = len(keep)
+                cap = max(n, 1024)
+                col = self._col.take(keep, cap)
+                exact_col = self._exact.take(keep, cap) if self._exact is not None else None
+                ts = np.zeros(cap, dtype=np.float64)
+                ts[:n] = self._ts[keep]
+                alive = np.zeros(cap, dtype=bool)
+                alive[:n] = True
+
+                removed = self.size - n
+                keep_list = keep.tolist()
+                self.ids = [self.ids[i] for i in keep_list]
+                self.texts = [self.texts[i] for i in keep_list]
+                self.metas = [self.metas[i] for i in keep_list]
+                self.id2row = {eid: i for i, eid in enumerate(self.ids)}
+                self._col, self._exact = col, exact_col
+                self._ts, self._alive = ts, alive
+                # 행 번호가 바뀌었으므로 필드 인덱스는 다음 필터 질의 때 다시 만든다
+                self.filters.reset()
+                self._free = []
+                self.size = n
+                self._layout += 1
+
+                if self.index is not None and self.index.is_trained:
+                    rows = np.arange(n)
+                    self.index.reset(self.index.centroids, rows, self.index.assign(self._decode(rows), self.index.centroids))
+                return removed
+        finally:
+            self._compacting = False
+
+    # ---------- 영속화 ----------
+
+    def attach_storage(self, storage: NamespaceStorage, snapshot_every: int = 0):
+        self.storage = storage
+        self.snapshot_every = snapshot_every
+
+    def _state(self) -> Dict[str, Any]:
+        # 스냅샷에는 살아있는 행만 기록 (디스크 상에서는 항상 compaction 된 상태)
+        keep = np.flatnonzero(self._alive[:self.size])
+        keep_list = keep.tolist()
+        state = {
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "rescore": self.rescore,
+            "index": self.index_kind,
+            "index_params": self.index_params,
+            "ts": self._ts[keep],
+            "ids": [self.ids[i] for i in keep_list],
+            "texts": [self.texts[i] for i in keep_list],
+            "metas": [self.metas[i] for i in keep_list]
+        }
+        if self._col is None:
+            state["vecs"] = np.zeros((0, 0), dtype=np.float32)
+        elif self.dtype == "float32" or self._exact is not None:
+            state["vecs"] = self._decode(keep)
+        else:
+            state["codes"] = self._col.codes[keep]
+            state["scale"] = self._col.scale[keep] if self._col.scale is not None else None
+        return state
+
+    def _restore(self, state: Dict[str, Any], block: int = 65536):
+        n = len(state["ids"])
+        dim = state.get("dim")
+        self._col = self._exact = None
+        self.dim = None
+        if dim and n == 0:
+            self._init_columns(dim, 0)
+        elif dim and self.dtype == "float32":
+            self.dim = dim
+            self._col = VectorColumn.wrap(state["vecs"], "float32")
+        elif dim and "codes" in state:
+            self.dim = dim
+            self._col = VectorColumn.wrap(state["codes"], self.dtype, state.get("scale"))
+        elif dim:
+            # 원본 float32 는 memmap 그대로 두고 양자화 컬럼만 블록 단위로 다시 만든다
+            self.dim = dim
+            vecs = state["vecs"]
+            # 늘어날 때도 RAM 으로 복사하지 않도록 _init_columns 와 같은 spill_dir 를 준다
+            self._exact = VectorColumn.wrap(vecs, "float32", spill_dir=self.spill_dir or tempfile.gettempdir())
+            self._col = VectorColumn(self.dtype, dim, n)
+            for b in range(0, n, block):
+                self._col.set(np.arange(b, min(b + block, n)), vecs[b:b + block])
+        self._ts = state["ts"]
+        self.ids = state["ids"]
+        self.texts = state["texts"]
+        self.metas = state["metas"]
+        self.size = len(self.ids)
+        self._alive = np.ones(self.size, dtype=bool)
+        self._free = []
+        self.id2row = {eid: i for i, eid in enumerate(self.ids)}
+        self.filters.reset()
+
+    def _apply_record(self, rec: Dict[str, Any], vecs: np.ndarray | None):
+        op = rec.get("op")
+        if op == "upsert" and vecs is not None:
+            self.upsert(rec["ids"], rec["texts"], vecs, rec["metas"], rec["ts"])
+        elif op == "delete":
+            self.delete(rec["ids"])
+        elif op == "meta":
+            self.update_metadata(rec["ids"], rec["metas"], replace=True)
+
+    def _maybe_snapshot(self):
+        if (self.storage is not None and self.snapshot_every and not self._snapshotting
+                and self.storage.wal_rows >= self.snapshot_every):
+            threading.Thread(target=self.snapshot, name=f"vec-snapshot-{self.name}", daemon=True).start()
+
+    def snapshot(self) -> bool:
+        # WAL 세대를 넘긴 시점의 상태를 스냅샷으로 쓰고 이전 세대 WAL 을 지운다
+        if self.storage is None:
+            return False
+        with self.lock:
+            if self._snapshotting:
+                return False
+            self._snapshotting = True
+            state = self._state()
+            gen = self.storage.rotate()
+        try:
+            self.storage.write_snapshot(gen, state)
+        finally:
+            self._snapshotting = False
+        return True
+
+    def query(
+        self,
+        qv: np.ndarray,
+        top_k: int,
+        exact: bool = False,
+        nprobe: int | None = None,
+        filter: Dict[str, Any] | None = None,
+        rescore: int | None = None
+    ) -> List[Dict[str, Any]]:
+        qv = np.asarray(qv, dtype=np.float32).reshape(1, -1)
+        return self.query_batch(qv, top_k, exact, nprobe, filter, rescore)[0]
+
+    def query_batch(
+        self,
+        qvs: np.ndarray,
+        top_k: int,
+        exact: bool = False,
+        nprobe: int | None = None,
+        filter: Dict[str, Any] | None = None,
+        rescore: int | None = None,
+        chunk: int = 256
+    ) -> List[List[Dict[str, Any]]]:
+        # 임베딩이 이미 정규화되어 있으므로 내적 = 코사인 유사도
+        # 결과는 lock 을 쥔 채로 문서로 바꿔 돌려준다 (lock 밖에서 행 번호를 읽으면 그 사이의
+        # 삭제 / 압축 / 빈 슬롯 재사용 때문에 다른 문서가 나올 수 있다)
+        qvs = np.asarray(qvs, dtype=np.float32)
+        m = len(qvs)
+        conds = parse_filter(filter)
+        with self.lock:
+            n = self.size
+            if n == 0 or top_k <= 0 or m == 0:
+                return [[] for _ in range(m)]
+
+            mask = None
+            if conds:
+                # 채점 전에 필터를 먼저 적용 (pre-filter)
+                mask = self.filters.mask(conds, self.metas, self._alive[:n], self._ts[:n])
+                if not mask.any():
+                    return [[] for _ in range(m)]
+
+            # 양자화 점수로 후보를 넉넉히 뽑고 float32 원본으로 재채점
+            if self._exact is not None and rescore != 0:
+                k = max(top_k, int(rescore) if rescore else top_k * 4)
+            else:
+                k = top_k
+
+            use_index = not exact and self.index is not None and self.index.is_trained
+            if use_index and mask is not None and int(mask.sum()) <= self.filter_exact_max:
+                # 남은 후보가 적으면 IVF 보다 정확 계산이 싸고 재현율도 100%
+                use_index = False
+
+            if use_index:
+                out = []
+                for qv in qvs:
+                    rows = self.index.candidates(qv, nprobe)
+                    if mask is not None:
+                        rows = rows[mask[rows]]
+                    out.append(_ranked(rows, self._col.scores(qv[None, :], rows)[0], k))
+            else:
+                if mask is not None:
+                    rows = np.flatnonzero(mask)
+                    dead = None
+                else:
+                    rows = None
+                    dead = ~self._alive[:n] if self._free else None
+
+                # 질의 묶음 x 전체 벡터를 행렬곱 한 번으로 채점 (메모리 상한을 위해 chunk 단위)
+                out = []
+                for s in range(0, m, chunk):
+                    scores = self._col.scores(qvs[s:s + chunk], rows, n)
+                    if dead is not None:
+                        scores[:, dead] = -np.inf
+                    for row_scores in scores:
+                        out.append(_ranked(rows, row_scores, k))
+
+            if k != top_k:
+                out = [self._rescore(qv, hits, top_k) for qv, hits in zip(qvs, out)]
+            return [[self.entry(row, score) for row, score in hits] for hits in out]
+
+    def _rescore(self, qv: np.ndarray, hits: List[Tuple[int, float]], top_k: int) -> List[Tuple[int, float]]:
+        if not hits:
+            return hits
+        rows = np.asarray([r for r, _ in hits], dtype=np.int64)
+        return _ranked(rows, self._exact.get(rows) @ qv, top_k)
+
+    def entry(self, row: int, score: float) -> Dict[str, Any]:
+        return {
+            "id": self.ids[row],
+            "text": self.texts[row],
+            "score": score,
+            "metadata": self.metas[row]
+        }
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "namespace": self.name,
+            "size": self.count,
+            "slots": self.size,
+            "tombstones": len(self._free),
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "rescore": self.rescore,
+            "vector_bytes": self._col.nbytes if self._col is not None else 0,
+            "index": self.index.info() if self.index is not None else {"kind": "flat"},
+            "rebuilding": self._rebuilding,
+            "filter_fields": self.filters.info(),
+            "persisted": self.storage is not None,
+            "wal_rows": self.storage.wal_rows if self.storage is not None else 0
+        }
+
+def _ranked(rows: np.ndarray | None, scores: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+    idx = _top_k(scores, top_k)
+    idx = idx[np.isfinite(scores[idx])]
+    if rows is not None:
+        return [(int(rows[i]), float(scores[i])) for i in idx]
+    return [(int(i), float(scores[i])) for i in idx]
+
+def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    n = len(scores)
+    k = min(top_k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+class VectorStore:
+    def __init__(
+        self,
+        root_dir: str | None = None,
+        snapshot_every: int = 100000,
+        fsync: bool = False,
+        spill_dir: str | None = None
+    ):
+        self.root_dir = root_dir
+        # rescore 네임스페이스의 float32 원본을 둘 디렉터리 (None 이면 시스템 임시 디렉터리)
+        self.spill_dir = spill_dir
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._namespaces: Dict[str, VectorNamespace] = {}
+        self._lock = threading.RLock()
+        # 디스크에 있는 네임스페이스는 이름만 기억해두고 처음 접근할 때 연다
+        self._persisted: set[str] = set(list_persisted(root_dir)) if root_dir else set()
+
+    def _load(self, name: str) -> VectorNamespace:
+        storage = NamespaceStorage(self.root_dir, name, self.fsync)
+        state = storage.load_snapshot()
+        if state is not None:
+            ns = VectorNamespace(
+                name,
+                index=state.get("index"),
+                index_params=state.get("index_params"),
+                dtype=state.get("dtype"),
+                rescore=state.get("rescore", False),
+                spill_dir=self.spill_dir
+            )
+            ns._restore(state)
+        else:
+            ns = VectorNamespace(name)
+        for rec, vecs in storage.replay():
+            ns._apply_record(rec, vecs)
+        ns.attach_storage(storage, self.snapshot_every)
+        if ns.index is not None and ns.size:
+            ns.rebuild_index(background=True)
+        return ns
+
+    def _attach(self, ns: VectorNamespace):
+        if self.root_dir:
+            ns.attach_storage(NamespaceStorage(self.root_dir, ns.name, self.fsync), self.snapshot_every)
+            self._persisted.add(ns.name)
+
+    def get(self, name: str) -> VectorNamespace | None:
+        ns = self._namespaces.get(name)
+        if ns is None and name in self._persisted:
+            with self._lock:
+                ns = self._namespaces.get(name)
+                if ns is None:
+                    ns = self._load(name)
+                    self._namespaces[name] = ns
+        return ns
+
+    def create(
+        self,
+        name: str,
+        index: str | None = None,
+        index_params: dict | None = None,
+        dtype: str | None = None,
+        rescore: bool = False
+    ) -> VectorNamespace:
+        with self._lock:
+            if self.get(name) is not None:
+                raise ValueError(f"이미 존재하는 네임스페이스: {name}")
+            ns = VectorNamespace(
+                name,
+                index=index,
+                index_params=index_params,
+                dtype=dtype,
+                rescore=rescore,
+                spill_dir=self.spill_dir
+            )
+            self._attach(ns)
+            # 인덱스 설정이 디스크에 남도록 빈 스냅샷을 바로 기록
+            ns.snapshot()
+            self._namespaces[name] = ns
+            return ns
+
+    def get_or_create(self, name: str, dim: int | None = None) -> VectorNamespace:
+        with self._lock:
+            ns = self.get(name)
+            if ns is None:
+                ns = VectorNamespace(name, dim)
+                self._attach(ns)
+                self._namespaces[name] = ns
+            return ns
+
+    def snapshot_all(self) -> List[str]:
+        return [name for name, ns in list(self._namespaces.items()) if ns.snapshot()]
+
+    def close(self):
+        for ns in self._namespaces.values():
+            if ns.storage is not None:
+                with ns.lock:
+                    ns.storage.close()
+
+    def list_namespaces(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {name: {"namespace": name, "loaded": False} for name in self._persisted}
+        for name, ns in list(self._namespaces.items()):
+            out[name] = {**ns.info(), "loaded": True}
+        return out